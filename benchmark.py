@@ -0,0 +1,634 @@
+"""
+Offline-Benchmark für bot.py gegen eine lokale Mock-GitHub-API.
+
+Der Mock emuliert /search/repositories (total_count, Pagination,
+1000-Result-Cap, ETags), /graphql (aliased repository-Queries +
+rateLimit) und /rate_limit auf einem synthetischen oder aufgezeichneten
+Korpus. Pro Phase werden Wall-Time, Requests, Sleep-Zeit und Recall
+gemessen.
+
+    python benchmark.py --repos 5000 --density 4
+    python benchmark.py --corpus recorded.json --fail-rate 0.05 --latency 50
+    python benchmark.py --json bench_output.txt
+    python benchmark.py --mining --repos 30000 --topics 5000
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from itertools import combinations
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import bot
+
+# ═══════════════════════════════════════════════════════════
+# KORPUS
+# ═══════════════════════════════════════════════════════════
+
+LANGUAGES = ['C', 'Python', 'Rust', 'C++', 'JavaScript', 'Go', 'Shell']
+
+def topic_vocabulary() -> List[str]:
+    """Alle Topics, die der Bot in seinen Queries benutzt"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        queries = bot.discover_topic_combinations({})
+    topics = set()
+    for query in queries:
+        for clause in bot.parse_query(query):
+            topics.update(atom[1] for atom in clause if atom[0] == 'topic')
+    return sorted(topics)
+
+def synthetic_corpus(size: int, density: float, seed: int) -> List[Dict]:
+    """
+    Synthetische Repos: Erstellung wächst zum aktuellen Datum hin,
+    Stars Pareto-verteilt, `density` = mittlere Topics pro Repo
+    (höher → mehr Überlappung zwischen den Queries).
+    """
+    rng = random.Random(seed)
+    vocabulary = topic_vocabulary()
+    hot = vocabulary[:max(1, len(vocabulary) // 10)]
+    today = datetime.now(timezone.utc).date()
+    span = (today - date(2012, 1, 1)).days
+
+    corpus = []
+    for repo_id in range(1, size + 1):
+        created = today - timedelta(days=int(span * rng.random() ** 3))
+        pushed = created + timedelta(days=int((today - created).days * rng.random()))
+        count = max(1, min(20, int(rng.expovariate(1 / density)) + 1))
+        topics = set(rng.sample(hot, min(len(hot), max(1, count // 2))))
+        topics.update(rng.sample(vocabulary, min(len(vocabulary), count - len(topics))))
+        corpus.append({
+            'id': repo_id,
+            'full_name': f"user{repo_id % 997}/repo-{repo_id}",
+            'stargazers_count': int(rng.paretovariate(1.2)) - 1,
+            'forks_count': int(rng.paretovariate(1.5)) - 1,
+            'topics': sorted(topics)[:20],
+            'language': rng.choice(LANGUAGES),
+            'size': int(rng.paretovariate(0.8) * 10),
+            'archived': rng.random() < 0.05,
+            'created_at': f"{created.isoformat()}T00:00:00Z",
+            'pushed_at': f"{pushed.isoformat()}T00:00:00Z",
+        })
+    return corpus
+
+def zipf_records(size: int, topics: int, seed: int) -> List[Dict]:
+    """Kompakte Records mit Zipf-verteilten Topics (Mining-Benchmark, ohne Mock)"""
+    rng = random.Random(seed)
+    names = [f"topic-{i}" for i in range(topics)]
+    weights = [1 / rank for rank in range(1, topics + 1)]
+    records = []
+    for i in range(size):
+        count = min(20, max(1, int(rng.expovariate(1 / 6))))
+        records.append({
+            'name': f"owner{i % 997}/repo-{i}",
+            'stars': int(rng.paretovariate(1.2)) - 1,
+            'topics': sorted(set(rng.choices(names, weights=weights, k=count))),
+        })
+    return records
+
+def load_corpus(path: str) -> List[Dict]:
+    """Aufgezeichneter Korpus: JSON-Liste von Search-Items"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# ═══════════════════════════════════════════════════════════
+# QUERY-AUSWERTUNG (CNF aus bot.parse_query)
+# ═══════════════════════════════════════════════════════════
+
+def _atom_matches(repo: Dict, atom: tuple) -> bool:
+    key = atom[0]
+
+    if len(atom) == 3:
+        if key in ('created', 'pushed'):
+            value = date.fromisoformat(repo[f"{key}_at"][:10]).toordinal()
+        else:
+            value = repo[{'stars': 'stargazers_count', 'forks': 'forks_count'}.get(key, key)]
+        return atom[1] <= value <= atom[2]
+
+    if key == 'topic':
+        return atom[1] in repo['topics']
+    if key == 'language':
+        return (repo.get('language') or '').lower() == atom[1]
+    if key == 'archived':
+        return str(repo.get('archived', False)).lower() == atom[1]
+    if key == 'text':
+        return atom[1] in repo['full_name'].lower() or atom[1] in repo['topics']
+    return False   # extension:, raw → matcht in der Repository-Search nie
+
+def repo_matches(repo: Dict, cnf: frozenset) -> bool:
+    return all(any(_atom_matches(repo, atom) for atom in clause) for clause in cnf)
+
+# ═══════════════════════════════════════════════════════════
+# MOCK SERVER
+# ═══════════════════════════════════════════════════════════
+
+class MockGitHub:
+    """Zustand des Mocks: Korpus, Zähler, Limits, Fehler-Injektion"""
+
+    def __init__(self, corpus: List[Dict], latency: float = 0.0, fail_rate: float = 0.0,
+                 search_limit: int = 0, window: float = 60.0, seed: int = 0):
+        self.corpus = corpus
+        self.by_name = {repo['full_name'].lower(): repo for repo in corpus}
+        self.by_owner = {}
+        for repo in sorted(corpus, key=lambda repo: repo['stargazers_count'], reverse=True):
+            self.by_owner.setdefault(repo['full_name'].split('/')[0], []).append(repo)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.search_limit = search_limit
+        self.window = window
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.bytes_sent = 0
+        self.search_window = (time.time(), 0)
+        self.graphql_remaining = 5000
+        self.match_cache = {}
+
+    def count(self, endpoint: str):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def matching(self, query: str) -> List[Dict]:
+        cnf = bot.parse_query(query)
+        with self.lock:
+            cached = self.match_cache.get(cnf)
+        if cached is None:
+            cached = [repo for repo in self.corpus if repo_matches(repo, cnf)]
+            with self.lock:
+                self.match_cache[cnf] = cached
+        return cached
+
+    def code_hits(self, query: str) -> List[Dict]:
+        """
+        Code-Search: jedes vierte Repo hat 1-4 Dateien je Typ (stabil aus
+        dem Namen gehasht), size: filtert nach Dateigröße, path: wird ignoriert.
+        """
+        kind = re.search(r'(?:extension|filename):(\S+)', query)
+        size = re.search(r'size:(\d+)\.\.(\d+)', query)
+        if not kind:
+            return []
+        hits = []
+        for repo in self.corpus:
+            digest = hashlib.sha1(f"{repo['full_name']}|{kind.group(1)}".encode()).digest()
+            if digest[0] % 4:
+                continue
+            for i in range(1 + digest[1] % 4):
+                file_size = int.from_bytes(digest[2 + 2 * i:4 + 2 * i], 'big') % 20_000
+                if size and not int(size.group(1)) <= file_size <= int(size.group(2)):
+                    continue
+                hits.append({'name': f"file{i}.{kind.group(1)}", 'path': f"assets/file{i}.{kind.group(1)}",
+                             'repository': {'id': repo['id'], 'full_name': repo['full_name']}})
+        return hits
+
+    def search_status(self) -> Dict:
+        """/rate_limit-Ressource der Search (ohne Limit: praktisch unbegrenzt)"""
+        if not self.search_limit:
+            return {'limit': 1_000_000, 'remaining': 1_000_000, 'reset': int(time.time() + 60)}
+        with self.lock:
+            started, used = self.search_window
+        return {'limit': self.search_limit, 'remaining': max(0, self.search_limit - used),
+                'reset': int(started + self.window)}
+
+    def take_search_token(self) -> Optional[tuple]:
+        """None = ok, sonst (reset, remaining) für ein 403"""
+        if not self.search_limit:
+            return None
+        with self.lock:
+            started, used = self.search_window
+            now = time.time()
+            if now - started >= self.window:
+                started, used = now, 0
+            if used >= self.search_limit:
+                self.search_window = (started, used)
+                return (started + self.window, 0)
+            self.search_window = (started, used + 1)
+        return None
+
+def make_handler(mock: MockGitHub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status: int, payload, headers: Optional[Dict] = None):
+            body = json.dumps(payload).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            if status == 200 and self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if status in (200, 304):
+                self.send_header('ETag', etag)
+            for name, value in (headers or {}).items():
+                self.send_header(name, str(value))
+            self.end_headers()
+            self.wfile.write(body)
+            with mock.lock:
+                mock.bytes_sent += len(body)
+
+        def inject_failure(self) -> bool:
+            if mock.latency:
+                threading.Event().wait(mock.latency)
+            if mock.fail_rate and mock.rng.random() < mock.fail_rate:
+                if mock.rng.random() < 0.5:
+                    self.send_json(403, {'message': 'You have exceeded a secondary rate limit'},
+                                   {'Retry-After': 1})
+                else:
+                    self.send_json(502, {'message': 'Bad Gateway'})
+                return True
+            return False
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {name: values[0] for name, values in parse_qs(url.query).items()}
+
+            if url.path == '/rate_limit':
+                mock.count('rate_limit')
+                reset = int(time.time() + 3600)
+                resource = {'limit': 5000, 'remaining': 5000, 'reset': reset}
+                self.send_json(200, {'resources': {
+                    'core': resource,
+                    'search': mock.search_status(),
+                    'graphql': {**resource, 'remaining': mock.graphql_remaining},
+                }})
+                return
+
+            if url.path == '/search/code':
+                mock.count('code')
+                if self.inject_failure():
+                    return
+                per_page = min(100, int(params.get('per_page', 30)))
+                page = int(params.get('page', 1))
+                hits = mock.code_hits(params.get('q', ''))
+                self.send_json(200, {
+                    'total_count': len(hits),
+                    'incomplete_results': False,
+                    'items': hits[(page - 1) * per_page:min(page * per_page, 1000)],
+                })
+                return
+
+            if url.path != '/search/repositories':
+                mock.count('other')
+                self.send_json(404, {'message': 'Not Found'})
+                return
+
+            mock.count('search')
+            if self.inject_failure():
+                return
+
+            limited = mock.take_search_token()
+            if limited:
+                self.send_json(403, {'message': 'API rate limit exceeded'},
+                               {'X-RateLimit-Remaining': 0, 'X-RateLimit-Reset': int(limited[0])})
+                return
+
+            per_page = min(100, int(params.get('per_page', 30)))
+            page = int(params.get('page', 1))
+            if page * per_page > 1000:
+                self.send_json(422, {'message': 'Only the first 1000 search results are available'})
+                return
+
+            items = mock.matching(params.get('q', ''))
+            self.send_json(200, {
+                'total_count': len(items),
+                'incomplete_results': False,
+                'items': items[(page - 1) * per_page:page * per_page],
+            })
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+
+            if urlparse(self.path).path != '/graphql':
+                mock.count('other')
+                self.send_json(404, {'message': 'Not Found'})
+                return
+
+            query = payload.get('query', '')
+            mock.count('graphql_search' if 'search(' in query else 'graphql')
+            if self.inject_failure():
+                return
+
+            data, errors = {}, []
+            if 'search(' in query:
+                # Cursor = Offset, wie bei REST max. 1000 Results erreichbar
+                variables = payload.get('variables') or {}
+                items = mock.matching(variables.get('q', ''))
+                offset = int(variables.get('after') or 0)
+                end = min(offset + variables.get('first', 1), len(items), 1000)
+                data['search'] = {
+                    'repositoryCount': len(items),
+                    'pageInfo': {'hasNextPage': end < min(len(items), 1000), 'endCursor': str(end)},
+                    'nodes': [graphql_repo(repo) for repo in items[offset:end]],
+                }
+            for alias, owner, name in re.findall(
+                    r'(\w+):\s*repository\(owner:\s*"([^"]+)",\s*name:\s*"([^"]+)"\)', query):
+                repo = mock.by_name.get(f"{owner}/{name}".lower())
+                if repo is None:
+                    data[alias] = None
+                    errors.append({'type': 'NOT_FOUND', 'path': [alias],
+                                   'message': f"Could not resolve to a Repository with the name '{owner}/{name}'."})
+                elif 'forks(' in query:
+                    # Graph-Expansion: keine Forks im Korpus, Owner-Repos schon
+                    data[alias] = {**graphql_repo(repo), 'forks': {'nodes': []}, 'templateRepository': None,
+                                   'owner': {'repositories': {'nodes': [
+                                       graphql_repo(other) for other in mock.by_owner[owner][:10]]}}}
+                else:
+                    data[alias] = graphql_repo(repo)
+
+            cost = max(1, len(data) // 10)
+            with mock.lock:
+                mock.graphql_remaining = max(0, mock.graphql_remaining - cost)
+                remaining = mock.graphql_remaining
+            if 'rateLimit' in query:
+                reset_at = datetime.now(timezone.utc) + timedelta(hours=1)
+                data['rateLimit'] = {'cost': cost, 'remaining': remaining,
+                                     'resetAt': reset_at.strftime('%Y-%m-%dT%H:%M:%SZ')}
+
+            response = {'data': data}
+            if errors:
+                response['errors'] = errors
+            self.send_json(200, response)
+
+    return Handler
+
+def graphql_repo(repo: Dict) -> Dict:
+    """Repository-Node mit allen Feldern, die der Bot anfragen kann"""
+    release_date = repo['pushed_at']
+    return {
+        'nameWithOwner': repo['full_name'],
+        'databaseId': repo['id'],
+        'stargazerCount': repo['stargazers_count'],
+        'forkCount': repo['forks_count'],
+        'createdAt': repo['created_at'],
+        'pushedAt': repo['pushed_at'],
+        'repositoryTopics': {'nodes': [{'topic': {'name': topic}} for topic in repo['topics']]},
+        'releases': {'nodes': [{'tagName': 'v1.0', 'name': 'v1.0', 'publishedAt': release_date,
+                                'url': f"https://github.com/{repo['full_name']}/releases/v1.0",
+                                'isPrerelease': False}]},
+        'refs': {'nodes': [{'name': 'v1.0', 'target': {'committedDate': release_date}}]},
+        'defaultBranchRef': {'target': {'history': {'nodes': [
+            {'oid': hashlib.sha1(repo['pushed_at'].encode()).hexdigest(),
+             'message': 'update', 'committedDate': repo['pushed_at']}
+        ]}}},
+    }
+
+def start_server(mock: MockGitHub) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# ═══════════════════════════════════════════════════════════
+# HARNESS
+# ═══════════════════════════════════════════════════════════
+
+class SleepMeter:
+    """Summiert time.sleep über alle Threads (Pacing + Backoff des Bots)"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.lock = threading.Lock()
+        self.original = time.sleep
+
+    def __enter__(self):
+        def sleep(seconds):
+            with self.lock:
+                self.total += max(0.0, seconds)
+            self.original(seconds)
+        time.sleep = sleep
+        return self
+
+    def __exit__(self, *exc):
+        time.sleep = self.original
+
+def configure_bot(server: ThreadingHTTPServer, workdir: str, real_limits: bool):
+    """Bot auf den Mock umbiegen, State/Cache/Journal in ein Temp-Verzeichnis"""
+    bot.API_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    bot.STATE_FILE = os.path.join(workdir, 'state.json')
+    bot.REPO_INDEX_FILE = os.path.join(workdir, 'repo_index.bin')
+    bot.REPO_RECORDS_FILE = os.path.join(workdir, 'repo_records.json')
+    bot.CACHE_DIR = os.path.join(workdir, 'http_cache')
+    bot.JOURNAL = bot.CrawlJournal(os.path.join(workdir, 'journal.ndjson'))
+    bot.RUN_SPOOL_FILE = os.path.join(workdir, 'run_spool.ndjson')
+    bot.PAYLOAD_SPOOL = bot.PayloadSpool(os.path.join(workdir, 'graphql_payloads.ndjson.gz'))
+    bot.METRICS_FILE = os.path.join(workdir, 'run_metrics.json')
+    bot.METRICS_PROM_FILE = os.path.join(workdir, 'metrics.prom')
+    bot.SHARD_DIR = os.path.join(workdir, 'shards')
+    bot.SNAPSHOT_DIR = os.path.join(workdir, 'snapshots')
+    bot.TELEGRAM_TRANSPORT = 'stub'
+    bot.GITHUB_TOKEN = bot.GITHUB_TOKEN or 'mock-token'   # Code-Search-Lane braucht ein Token
+    bot.BACKOFF_BASE = 0.05
+    bot.SECONDARY_LIMIT_WAIT = 1.0
+
+    if not real_limits:
+        for bucket in bot.RATE_BUCKETS.values():
+            bucket.base_rate = bucket.rate = 1000.0
+            bucket.capacity = bucket.tokens = 1000.0
+        bot.TELEGRAM_PER_MIN = 60_000
+
+def measure(name: str, mock: MockGitHub, fn, verbose: bool) -> Dict:
+    """Führt eine Phase aus und misst Wall-Time, Requests, Bytes, Sleep"""
+    requests_before = dict(mock.requests)
+    bytes_before = mock.bytes_sent
+
+    with SleepMeter() as meter:
+        started = time.perf_counter()
+        if verbose:
+            result = fn()
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = fn()
+        wall = time.perf_counter() - started
+
+    requests_made = {
+        endpoint: count - requests_before.get(endpoint, 0)
+        for endpoint, count in mock.requests.items()
+        if count - requests_before.get(endpoint, 0)
+    }
+    return {
+        'phase': name,
+        'wall_s': round(wall, 3),
+        'requests': requests_made,
+        'bytes': mock.bytes_sent - bytes_before,
+        'sleep_s': round(meter.total, 3),
+        'result': result,
+    }
+
+def run_benchmark(args) -> List[Dict]:
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.repos, args.density, args.seed)
+    mock = MockGitHub(corpus, latency=args.latency / 1000, fail_rate=args.fail_rate,
+                      search_limit=args.search_limit, window=args.window, seed=args.seed)
+    server = start_server(mock)
+    workdir = tempfile.mkdtemp(prefix='flipper_bench_')
+    configure_bot(server, workdir, args.real_limits)
+    bot.SEARCH_BACKEND = args.backend
+
+    state = bot.load_state()
+    with contextlib.redirect_stdout(io.StringIO()):
+        plan = [entry for entry in bot.plan_queries(bot.discover_topic_combinations(state), state)
+                if 'covered_by' not in entry][:args.queries]
+    queries = [entry['query'] for entry in plan]
+
+    # Ground Truth: alle Korpus-Repos, die eine der Queries matchen (ohne Cap)
+    truth = set()
+    for query in queries:
+        truth.update(repo['full_name'] for repo in mock.matching(query))
+
+    found = {}
+
+    def phase_search():
+        for query in queries:
+            found.update(bot.break_1000_limit_search(query))
+        return len(found)
+
+    def phase_graphql():
+        return len(bot.graphql_mega_batch(sorted(found), state))
+
+    def phase_analysis():
+        return len(bot.analyze_topic_patterns(list(found.values()))['singles'])
+
+    def phase_main():
+        # Kalt = ohne den HTTP-Cache der Einzel-Phasen
+        shutil.rmtree(bot.CACHE_DIR, ignore_errors=True)
+        bot.INCOMPLETE_SLICES.clear()
+        bot.main(['--full'] if args.full else [])
+        return len(bot.load_state()['index'])
+
+    def phase_main_incremental():
+        bot.main([])
+        return len(bot.load_state()['index'])
+
+    results = [
+        measure('search', mock, phase_search, args.verbose),
+        measure('graphql', mock, phase_graphql, args.verbose),
+        measure('analysis', mock, phase_analysis, args.verbose),
+    ]
+    results[0]['recall'] = round(len(truth & found.keys()) / len(truth), 4) if truth else 1.0
+
+    if not args.skip_main:
+        results.append(measure('main (cold)', mock, phase_main, args.verbose))
+        results.append(measure('main (incremental)', mock, phase_main_incremental, args.verbose))
+
+    server.shutdown()
+    return results
+
+def brute_force_itemsets(records: List[Dict], min_support: int) -> Dict[int, Counter]:
+    """Referenz wie vor dem Eclat-Mining: alle Paare/Tripel jedes Repos zählen"""
+    counts = {2: Counter(), 3: Counter()}
+    for record in records:
+        topics = sorted(set(record.get('topics') or ()))
+        for length in (2, 3):
+            counts[length].update(combinations(topics, length))
+    return {length: Counter({itemset: count for itemset, count in counter.items() if count >= min_support})
+            for length, counter in counts.items()}
+
+def run_mining(args) -> List[Dict]:
+    """Eclat (bot.mine_topic_itemsets, Länge ≤ 3) gegen Brute Force: Zeit, Peak-Speicher, Gleichheit"""
+    records = zipf_records(args.repos, args.topics, args.seed)
+    results = []
+
+    for name, fn in (('brute force', lambda: brute_force_itemsets(records, bot.ITEMSET_MIN_SUPPORT)),
+                     ('eclat', lambda: bot.mine_topic_itemsets(records, max_len=3))):
+        # Zeit ohne tracemalloc messen (bremst Allokationen stark), Speicher im zweiten Lauf
+        started = time.perf_counter()
+        output = fn()
+        wall = time.perf_counter() - started
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append({'phase': name, 'wall_s': round(wall, 3), 'peak_mb': round(peak / 2 ** 20, 1),
+                        'output': output})
+
+    # Top-k der Eclat-Ausgabe muss exakt den Brute-Force-Zählungen entsprechen
+    brute, mined = results[0]['output'], results[1]['output']
+    for length in (2, 3):
+        top = [count for _, count in brute[length].most_common(bot.ITEMSET_TOP_K)]
+        got = mined['itemsets'].get(length, [])
+        assert [stats['count'] for _, stats in got] == top, f"Länge {length}: Top-k weicht ab"
+        assert all(brute[length][topics] == stats['count'] for topics, stats in got)
+    assert mined['found'] == len(brute[2]) + len(brute[3])
+
+    for entry in results:
+        output = entry.pop('output')
+        entry['result'] = mined['found'] if entry['phase'] == 'eclat' else sum(map(len, output.values()))
+    return results
+
+def print_mining(results: List[Dict], args):
+    print(f"\n{'='*78}")
+    print(f"⛏️ MINING: {args.repos} Records, {args.topics} Zipf-Topics, Support ≥ {bot.ITEMSET_MIN_SUPPORT}, Länge ≤ 3")
+    print(f"{'='*78}")
+    print(f"  {'phase':<20} {'wall s':>8} {'peak MB':>9}  itemsets")
+    for entry in results:
+        print(f"  {entry['phase']:<20} {entry['wall_s']:>8.2f} {entry['peak_mb']:>9.1f}  {entry['result']}")
+    print(f"{'='*78}\n")
+
+def print_report(results: List[Dict], args):
+    print(f"\n{'='*78}")
+    print(f"📏 BENCHMARK: {args.corpus or f'{args.repos} synthetic repos, density {args.density}'}, "
+          f"{args.queries} queries, backend {args.backend}, latency {args.latency}ms, fail {args.fail_rate:.0%}")
+    print(f"{'='*78}")
+    print(f"  {'phase':<20} {'wall s':>8} {'requests':>9} {'KB':>9} {'sleep s':>8} {'recall':>7}  result")
+    for entry in results:
+        total = sum(entry['requests'].values())
+        recall = f"{entry['recall']:.1%}" if 'recall' in entry else ''
+        print(f"  {entry['phase']:<20} {entry['wall_s']:>8.2f} {total:>9} {entry['bytes'] / 1024:>9.0f} "
+              f"{entry['sleep_s']:>8.2f} {recall:>7}  {entry['result']}")
+        detail = ", ".join(f"{name} {count}" for name, count in sorted(entry['requests'].items()))
+        if detail:
+            print(f"  {'':<20} ↳ {detail}")
+    print(f"{'='*78}\n")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline-Benchmark gegen eine Mock-GitHub-API")
+    parser.add_argument('--repos', type=int, default=5000, help="Größe des synthetischen Korpus")
+    parser.add_argument('--density', type=float, default=4.0, help="Mittlere Topics pro Repo")
+    parser.add_argument('--corpus', help="Aufgezeichneter Korpus (JSON-Liste von Search-Items)")
+    parser.add_argument('--queries', type=int, default=20, help="Anzahl geplanter Queries für die Search-Phase")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--backend', choices=('rest', 'graphql'), default='rest',
+                        help="Discovery-Backend des Bots (SEARCH_BACKEND)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Zusätzliche Latenz pro Request (ms)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Anteil injizierter 403/502")
+    parser.add_argument('--search-limit', type=int, default=0, help="Search-Requests pro Fenster (0 = aus)")
+    parser.add_argument('--window', type=float, default=60.0, help="Länge des Search-Limit-Fensters (s)")
+    parser.add_argument('--real-limits', action='store_true', help="Bot-Buckets nicht beschleunigen")
+    parser.add_argument('--full', action='store_true', help="main() mit --full laufen lassen")
+    parser.add_argument('--skip-main', action='store_true', help="Nur die Einzel-Phasen messen")
+    parser.add_argument('--verbose', action='store_true', help="Ausgaben des Bots anzeigen")
+    parser.add_argument('--json', help="Ergebnisse zusätzlich als JSON schreiben")
+    parser.add_argument('--mining', action='store_true',
+                        help="Nur Topic-Mining messen: Eclat gegen Brute Force auf Zipf-Topics")
+    parser.add_argument('--topics', type=int, default=5000, help="Topic-Vokabular für --mining")
+    args = parser.parse_args(argv)
+
+    if args.mining:
+        results = run_mining(args)
+        print_mining(results, args)
+    else:
+        results = run_benchmark(args)
+        print_report(results, args)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, default=str)
+
+if __name__ == "__main__":
+    sys.exit(main())
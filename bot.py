@@ -1,18 +1,162 @@
 import requests
+import numpy as np
 import os
 import json
+import gzip
 import time
 import re
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Set
-from collections import defaultdict
+import random
+import math
+import hashlib
+import heapq
+import itertools
+import bisect
+import mmap
+import struct
+import sys
+from array import array
+import argparse
+import threading
+import queue
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone, timedelta
+from typing import List, Dict, Optional
+from collections import Counter, defaultdict, deque
+from urllib.parse import urlencode
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson   # optional: schnellerer Parser, sonst json aus der Stdlib
+except ImportError:
+    orjson = None
 
 # ═══════════════════════════════════════════════════════════
 # KONFIGURATION
 # ═══════════════════════════════════════════════════════════
 
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
-STATE_FILE = "/tmp/flipper_mega_state.json"
+# Token-Pool für Shards: Shard i nimmt GITHUB_TOKENS[i % len]
+GITHUB_TOKENS = [token.strip() for token in os.environ.get("GITHUB_TOKENS", "").split(",") if token.strip()]
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+STATE_FILE = os.environ.get("STATE_FILE", "/tmp/flipper_mega_state.json")
+
+# Repo-Index (numerische IDs, mmap-bar) + kompakte Records (erst für Phase 3 geladen)
+REPO_INDEX_FILE = os.environ.get("REPO_INDEX_FILE", "/tmp/flipper_repo_index.bin")
+REPO_RECORDS_FILE = os.environ.get("REPO_RECORDS_FILE", "/tmp/flipper_repo_records.json")
+BLOOM_BITS_PER_ENTRY = 10   # ≈ 1% False Positives bei 7 Hashes
+BLOOM_HASHES = 7
+
+# Search-API liefert max. 1000 Results pro Query
+SEARCH_CAP = 1000
+SEARCH_START = date(2008, 1, 1)  # GitHub-Start, nicht nur Flipper-Launch
+SIZE_MAX = 2 ** 24               # KB, größer ist kein Repo
+
+# Discovery-Backend: "rest" = /search/repositories, "graphql" = search() inkl.
+# Enrichment-Feldern (Punkte-Budget statt 30/min, spart den GraphQL-Nachlauf)
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "rest")
+GRAPHQL_SEARCH_PAGE = 100       # Nodes pro search()-Seite, halbiert bei Timeouts
+GRAPHQL_SEARCH_MIN_PAGE = 25
+
+# Code-Search-Lane: eigenes Budget (Calls/Lauf), 10/min, nur Dateien < 384 KB
+CODE_SEARCH_BUDGET = int(os.environ.get("CODE_SEARCH_BUDGET", "200"))
+CODE_PER_MIN = 10
+CODE_SIZE_MAX = 384 * 1024
+CODE_PATH_SLICES = ('subghz', 'nfc', 'infrared', 'assets', 'resources', 'apps')
+
+# Streaming-Pipeline: Enrichment-Batches, Queue-Tiefe, Feedback-Intervall, Spool
+ENRICH_BATCH = 50              # so viele veraltete Repos → sofort GraphQL
+PIPELINE_QUEUE_BATCHES = 8     # volle Queue bremst die Search
+FEEDBACK_EVERY = 500           # neue Records bis zur nächsten Pattern-Runde
+RUN_SPOOL_FILE = os.environ.get("RUN_SPOOL_FILE", "/tmp/flipper_run_spool.ndjson")
+# Volle GraphQL-Antworten als gzip-NDJSON (leer = aus), im Speicher bleiben nur Projektionen
+PAYLOAD_SPOOL_FILE = os.environ.get("PAYLOAD_SPOOL_FILE", "/tmp/flipper_graphql_payloads.ndjson.gz")
+
+# Re-Enrichment: festes Repo-Budget pro Lauf, nächster Refresh aus der Aktivität
+ENRICH_BUDGET = int(os.environ.get("ENRICH_BUDGET", "2000"))   # Search-Treffer + fällige Repos
+REFRESH_MIN = 3600                 # s, heiße Repos → jeden Lauf
+REFRESH_MAX = 7 * 86400            # s, auch ruhende Repos spätestens nach einer Woche
+REFRESH_PUSH_FACTOR = 0.25         # vor 4 Tagen gepusht → in 1 Tag wieder
+REFRESH_RELEASE_FACTOR = 0.25      # Release alle 8 Tage → alle 2 Tage prüfen
+REFRESH_HOT_STARS = 10.0           # Stars/Tag, die das Intervall halbieren
+
+# Graph-Expansion: BFS über Forks/Templates/Owner-Repos der enrichten Repos
+GRAPH_NODE_BUDGET = int(os.environ.get("GRAPH_NODE_BUDGET", "300"))   # expandierte Repos pro Lauf
+GRAPH_MAX_DEPTH = 2
+GRAPH_EXPAND_STARS = 10        # nur ab so vielen Stars weiter expandieren
+GRAPH_KEEP_STARS = 1           # Nachbarn darunter (meist unveränderte Forks) verwerfen
+GRAPH_FORKS = 20               # Top-Forks nach Stars pro Repo
+GRAPH_OWNER_REPOS = 10         # Top-Repos des Owners (ohne Forks)
+GRAPH_REFRESH_RUNS = 56        # ≈ 1 Woche bei 8 Läufen/Tag, bis ein Repo erneut expandiert wird
+
+# Stars/Forks-Zeitreihen: Segment-Verzeichnis, Retention, Trend-Fenster
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "/tmp/flipper_snapshots")
+SNAPSHOT_RETENTION_DAYS = 90     # ältere Punkte fallen bei der Kompaktierung weg
+SNAPSHOT_COMPACT_SEGMENTS = 16   # so viele Segmente → zu einem zusammenfassen
+TREND_WINDOW_DAYS = 7            # Velocity = Stars/Tag im letzten Fenster
+TREND_TOP = 15
+
+# Sharding: Ausgabe der Shard-Worker, Slice-Grenzen der Work-Units
+SHARD_DIR = os.environ.get("SHARD_DIR", "/tmp/flipper_shards")
+SHARD_SLICE_START = 2020   # davor eine gemeinsame Slice, ab hier eine pro Jahr
+
+# Crawl-Journal für Resume nach Timeout/Abbruch
+JOURNAL_FILE = os.environ.get("JOURNAL_FILE", "/tmp/flipper_crawl_journal.ndjson")
+JOURNAL_MAX_AGE = timedelta(days=1)
+JOURNAL_FORMAT = 3   # 3 = Suchseiten mit total_count, GraphQL-Einheiten als Projektion
+
+# Topic-Mining: Mindest-Support, max. Kombinationslänge (None = beliebig), Top-k
+ITEMSET_MIN_SUPPORT = 3
+ITEMSET_MAX_LEN = 5
+ITEMSET_TOP_K = 30
+
+# HTTP-Cache auf Disk (leer = aus)
+CACHE_DIR = os.environ.get("CACHE_DIR", "/tmp/flipper_http_cache")
+CACHE_MAX_BYTES = 100 * 1024 * 1024
+CACHE_TTL_HISTORICAL = 7 * 24 * 3600   # abgeschlossene Date-Slices
+CACHE_TTL_CURRENT = 15 * 60            # laufender Monat, offene Ranges
+CACHE_CLOSED_AFTER = timedelta(days=31)
+
+# Search-Budget pro Lauf (Calls), davon Anteil für Phase-4-Pattern-Queries
+SEARCH_BUDGET = int(os.environ.get("SEARCH_BUDGET", "1500"))
+PATTERN_BUDGET_SHARE = 0.2
+
+# Bandit: Anteil fürs Ausprobieren neuer Queries, UCB-Bonus, Yield-Fenster
+EXPLORE_SHARE = 0.2
+UCB_C = 1.0
+YIELD_WINDOW = 5
+# Stopp-Regel: nach RETIRE_AFTER Läufen ohne neue Repos pausieren (verdoppelt sich)
+RETIRE_AFTER = 3
+RETIRE_PAUSE = 4
+RETIRE_MAX_PAUSE = 64
+
+# Parallele HTTP-Requests (Pool-Größe = Anzahl Worker)
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", "8"))
+# Code-Search: 10 calls/min → mehr Worker würden nur im Bucket schlafen
+CODE_WORKERS = 2
+
+# Überlappung beim inkrementellen Crawl (fängt verspätet indexierte Repos ab)
+WATERMARK_OVERLAP = timedelta(days=1)
+
+# Telegram: Digest-Nachrichten, max. 20/min in Kanäle, Rest bleibt in der Outbox
+TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN", "")
+CHANNEL_ID = os.environ.get("CHANNEL_ID", "")
+TELEGRAM_API_URL = os.environ.get("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_TRANSPORT = os.environ.get("TELEGRAM_TRANSPORT", "")   # "stub" = nur lokal ausgeben
+TELEGRAM_MAX_CHARS = 4096
+TELEGRAM_PER_MIN = 20
+TELEGRAM_MAX_MESSAGES = 60         # pro Lauf, der Rest geht in den nächsten
+TELEGRAM_MAX_RETRY_WAIT = 120.0    # längeres retry_after → Abbruch, nächster Lauf
+DIGEST_MAX_REPOS = 300             # mehr neue Repos → Rest nur als Zusammenfassung
+OUTBOX_MAX = 20_000
+
+# Gemeldete Events: gehashte IDs, älteste fliegen ab dieser Anzahl raus
+POSTED_EVENTS_MAX = 50_000
+
+# Run-Metriken: JSON-Report + Prometheus-Textfile (leer = aus)
+METRICS_FILE = os.environ.get("METRICS_FILE", "/tmp/flipper_run_metrics.json")
+METRICS_PROM_FILE = os.environ.get("METRICS_PROM_FILE", "/tmp/flipper_metrics.prom")
 
 def get_headers():
     """Headers mit Token"""
@@ -21,15 +165,329 @@ def get_headers():
         h["Authorization"] = f"token {GITHUB_TOKEN}"
     return h
 
+# ═══════════════════════════════════════════════════════════
+# HTTP ENGINE (Session-Pool + Token Buckets)
+# ═══════════════════════════════════════════════════════════
+
+class TokenBucket:
+    """
+    Thread-sicherer Token Bucket: `rate` Tokens/Sekunde, max `capacity`.
+    acquire() reserviert sofort und schläft nur die eigene Wartezeit.
+    Die Rate folgt den X-RateLimit-Headern (sync), pause() sperrt den
+    ganzen Bucket z.B. bis X-RateLimit-Reset oder für Retry-After.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            wait = max(wait, self.blocked_until - now)
+        
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    def refund(self, tokens: float = 1.0):
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + tokens)
+    
+    def pause(self, seconds: float):
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+    
+    def sync(self, remaining: int, reset_at: float):
+        """Verteilt das Rest-Budget gleichmäßig bis zum Reset"""
+        seconds = max(1.0, reset_at - time.time())
+        with self.lock:
+            self.tokens = min(self.tokens, remaining)
+            self.rate = min(self.base_rate, max(remaining, 1) / seconds)
+        if remaining <= 0:
+            self.pause(seconds + 1)
+
+# Budgets: Search 30/min (ohne Token 10/min), Core 5000/h, GraphQL ~5000 Punkte/h
+SEARCH_PER_MIN = 30 if GITHUB_TOKEN else 10
+RATE_BUCKETS = {
+    'search': TokenBucket(SEARCH_PER_MIN / 60, SEARCH_PER_MIN / 3),
+    'core': TokenBucket(5000 / 3600, 20),
+    'graphql': TokenBucket(1.0, 5),
+    'code': TokenBucket(CODE_PER_MIN / 60, CODE_PER_MIN / 3),
+}
+# GraphQL-search() teilt sich Bucket + Punkte mit GraphQL, zählt aber als Search-Call
+RATE_BUCKETS['graphql_search'] = RATE_BUCKETS['graphql']
+SEARCH_BUCKETS = ('search', 'graphql_search')
+
+# GraphQL: Punkte-Budget (rateLimit-Feld jeder Antwort) + Batch-Grenzen
+GRAPHQL_NODE_LIMIT = 500_000
+GRAPHQL_MAX_ALIASES = 100
+GRAPHQL_START_ALIASES = 50
+GRAPHQL_FAST_SECONDS = 5.0     # schneller → Batch vergrößern
+GRAPHQL_RESERVE = 100          # Punkte, die nie verbraucht werden
+GRAPHQL_POINTS = 5000          # Punkte pro Stunde, ab resetAt wieder voll
+GRAPHQL_RESET_WAIT = 300       # s, so kurz vor dem Reset lieber warten als abbrechen
+GRAPHQL_BUDGET = {'remaining': GRAPHQL_POINTS, 'last_cost': 1, 'reset_at': 0.0}
+_graphql_lock = threading.Lock()
+
+# Retry: exponentieller Backoff mit Full Jitter
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+SECONDARY_LIMIT_WAIT = 60.0   # GitHub-Empfehlung ohne Retry-After
+RETRY_STATUS = {500, 502, 503, 504}
+
+_session = requests.Session()
+
+# Ein Executor pro Spur: Search-Leaves, GraphQL-Enrichment und Code-Lane
+# warten nicht in derselben FIFO-Queue aufeinander
+LANE_WORKERS = {'search': MAX_WORKERS, 'graphql': MAX_WORKERS, 'code': CODE_WORKERS}
+_executors = {lane: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"http-{lane}")
+              for lane, workers in LANE_WORKERS.items()}
+_lane = contextvars.ContextVar('lane', default='search')
+
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=sum(LANE_WORKERS.values())))
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=sum(LANE_WORKERS.values())))
+
+# HTTP-Calls pro Bucket (inkl. Retries)
+REQUEST_COUNTS = defaultdict(int)
+_counts_lock = threading.Lock()
+
+# Slices/Seiten, die trotz Retries nicht geholt werden konnten
+INCOMPLETE_SLICES: List[Dict] = []
+_incomplete_lock = threading.Lock()
+# Liste des laufenden Crawls (Query / Code-Lane), wird an Worker vererbt
+_incomplete_sink = contextvars.ContextVar('incomplete_sink', default=None)
+
+def search_calls() -> int:
+    """Discovery-Calls beider Backends (Search-Budget + Query-Yield)"""
+    with _counts_lock:
+        return sum(REQUEST_COUNTS[bucket] for bucket in SEARCH_BUCKETS)
+
+def mark_incomplete(query: str, page: Optional[int], reason: str):
+    """Merkt eine unvollständige Slice für den Report am Ende und im laufenden Crawl"""
+    entry = {'query': query, 'page': page, 'reason': reason}
+    sink = _incomplete_sink.get()
+    with _incomplete_lock:
+        INCOMPLETE_SLICES.append(entry)
+        if sink is not None:
+            sink.append(entry)
+    METRICS.add('incomplete')
+    print(f"    ❌ UNVOLLSTÄNDIG: {query[:70]} (page {page}): {reason}")
+
+@contextmanager
+def track_incomplete(sink: Optional[List[Dict]] = None):
+    """
+    Sammelt die Slices, die im Block (inkl. Worker-Tasks) unvollständig
+    bleiben, in einer eigenen Liste. Andere Threads schreiben nicht hinein →
+    Watermarks hängen nur an den eigenen Lücken.
+    """
+    sink = [] if sink is None else sink
+    token = _incomplete_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _incomplete_sink.reset(token)
+
+def backoff_delay(attempt: int) -> float:
+    """Full Jitter: uniform(0, min(cap, base * 2^attempt))"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def apply_rate_headers(bucket: Optional[str], resp: requests.Response):
+    """X-RateLimit-Remaining/-Reset jeder Response in den Bucket übernehmen"""
+    remaining = resp.headers.get('X-RateLimit-Remaining')
+    reset = resp.headers.get('X-RateLimit-Reset')
+    if bucket and remaining is not None and reset is not None:
+        RATE_BUCKETS[bucket].sync(int(remaining), float(reset))
+
+def rate_limit_wait(resp: requests.Response) -> Optional[float]:
+    """
+    Wartezeit für 403/429-Rate-Limits, None wenn es KEIN Rate Limit ist
+    (z.B. 403 wegen fehlender Rechte → nicht retryen)
+    """
+    retry_after = resp.headers.get('Retry-After')
+    if retry_after is not None:
+        return float(retry_after)
+    
+    if resp.headers.get('X-RateLimit-Remaining') == '0':
+        reset = float(resp.headers.get('X-RateLimit-Reset', time.time() + SECONDARY_LIMIT_WAIT))
+        return max(1.0, reset - time.time() + 1)
+    
+    if resp.status_code == 429 or 'rate limit' in resp.text.lower():
+        return SECONDARY_LIMIT_WAIT
+    
+    return None
+
+def api_request(method: str, path: str, bucket: Optional[str], **kwargs) -> Optional[requests.Response]:
+    """
+    Request mit Pacing + Retry:
+    - 403/429 Rate Limit → ganzer Bucket pausiert (Retry-After / Reset)
+    - 5xx + Verbindungsfehler → Backoff mit Jitter, nur dieser Request
+    Liefert die letzte Response (ggf. Fehlerstatus) oder None.
+    """
+    resp = None
+    
+    for attempt in range(MAX_RETRIES + 1):
+        if bucket:
+            METRICS.add('sleep_seconds', RATE_BUCKETS[bucket].acquire())
+        with _counts_lock:
+            REQUEST_COUNTS[bucket] += 1
+        
+        started = time.monotonic()
+        try:
+            resp = _session.request(method, f"{API_URL}{path}", **kwargs)
+        except requests.RequestException as e:
+            METRICS.request(bucket, time.monotonic() - started, 0, attempt > 0)
+            resp, reason = None, str(e)
+            wait, rate_limited = backoff_delay(attempt), False
+        else:
+            METRICS.request(bucket, time.monotonic() - started, len(resp.content or b''), attempt > 0)
+            apply_rate_headers(bucket, resp)
+            
+            if resp.status_code in (403, 429):
+                wait = rate_limit_wait(resp)
+                if wait is None:
+                    return resp
+                reason, rate_limited = f"Rate Limit {resp.status_code}", True
+            elif resp.status_code in RETRY_STATUS:
+                reason = f"HTTP {resp.status_code}"
+                wait, rate_limited = backoff_delay(attempt), False
+            else:
+                return resp
+        
+        if attempt == MAX_RETRIES:
+            break
+        
+        print(f"  ⏳ {method} {path}: {reason} → {wait:.1f}s Pause, retry {attempt + 1}/{MAX_RETRIES}")
+        if rate_limited and bucket:
+            RATE_BUCKETS[bucket].pause(wait)   # Wartezeit zählt beim nächsten acquire()
+        else:
+            METRICS.add('sleep_seconds', wait)
+            time.sleep(wait)
+    
+    return resp
+
+def api_get(path: str, params: Optional[Dict] = None, bucket: Optional[str] = 'core',
+            timeout: int = 15, cache: bool = True):
+    """
+    GET über die gemeinsame Session, gedrosselt über den Bucket.
+    Mit cache=True: frische Einträge ohne Request, sonst Conditional
+    Request (If-None-Match / If-Modified-Since), 304 → Body von Disk.
+    """
+    if not (cache and CACHE_DIR):
+        return api_request("GET", path, bucket, params=params, headers=get_headers(), timeout=timeout)
+    
+    key = cache_key(path, params)
+    entry = cache_load(key)
+    if entry and time.time() - entry['stored_at'] < entry['ttl']:
+        METRICS.add('cache_hits')
+        return CachedResponse(entry)
+    
+    headers = get_headers()
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    
+    resp = api_request("GET", path, bucket, params=params, headers=headers, timeout=timeout)
+    
+    if entry and resp is not None and resp.status_code == 304:
+        # 304 zählt nicht gegen das Rate Limit → Token zurückgeben
+        if bucket:
+            RATE_BUCKETS[bucket].refund()
+            METRICS.add(f'budget_{bucket}', -1)
+        METRICS.add('cache_hits')
+        entry['stored_at'] = time.time()
+        entry['ttl'] = cache_ttl(params)
+        cache_store(key, entry)
+        return CachedResponse(entry)
+    
+    if resp is not None and resp.status_code == 200:
+        cache_store(key, {
+            'url': key,
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+            'stored_at': time.time(),
+            'ttl': cache_ttl(params),
+            'body': resp.text,
+        })
+    elif entry and (resp is None or resp.status_code >= 500 or
+                    (resp.status_code in (403, 429) and rate_limit_wait(resp) is not None)):
+        # Ausfall/Rate Limit trotz Retries → lieber veraltete Daten als eine Lücke;
+        # andere 4xx (404, 422) sind echte Fehler der Query und gehen durch
+        print(f"  ♻️ Stale Cache für {path} (HTTP {resp.status_code if resp is not None else '-'})")
+        return CachedResponse(entry)
+    
+    return resp
+
+def api_post(path: str, payload: Dict, bucket: Optional[str] = 'graphql',
+             timeout: int = 30) -> Optional[requests.Response]:
+    """POST über die gemeinsame Session, gedrosselt über den Bucket"""
+    return api_request(
+        "POST", path, bucket,
+        json=payload,
+        headers={**get_headers(), "Accept": "application/vnd.github.v4+json"},
+        timeout=timeout
+    )
+
+def json_loads(raw):
+    """JSON aus str/bytes, mit orjson wenn installiert"""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+def response_json(resp):
+    """Response-Body parsen: orjson direkt auf den Bytes, sonst resp.json()"""
+    if orjson is None:
+        return resp.json()
+    return orjson.loads(resp.content if isinstance(resp, requests.Response) else resp.text)
+
+def iter_parallel(fn, items: List, lane: Optional[str] = None):
+    """
+    Führt fn(item) im Executor der Spur aus (Default: Spur des aufrufenden
+    Threads) und liefert die Ergebnisse in Eingabe-Reihenfolge, sobald sie
+    fertig sind. Jeder Task läuft in einer Kopie des aufrufenden Kontexts
+    (Metrik-Scope).
+    """
+    items = list(items)
+    if len(items) <= 1:
+        yield from (fn(item) for item in items)
+        return
+    executor = _executors[lane or _lane.get()]
+    tasks = [(contextvars.copy_context(), item) for item in items]
+    yield from executor.map(lambda task: task[0].run(fn, task[1]), tasks)
+
+def run_parallel(fn, items: List, lane: Optional[str] = None) -> List:
+    """Wie iter_parallel, wartet aber auf alle Ergebnisse"""
+    return list(iter_parallel(fn, items, lane))
+
 def check_rate_limit():
     """Prüfe Rate Limit Status"""
     try:
-        resp = requests.get("https://api.github.com/rate_limit", headers=get_headers(), timeout=10)
-        data = resp.json()
+        resp = api_get("/rate_limit", bucket=None, timeout=10, cache=False)
+        data = response_json(resp)
         
         core = data['resources']['core']
         search = data['resources']['search']
         
+        # Startwerte für die Buckets, danach halten die Response-Header sie aktuell
+        RATE_BUCKETS['core'].sync(core['remaining'], core['reset'])
+        RATE_BUCKETS['search'].sync(search['remaining'], search['reset'])
+        if 'code_search' in data['resources']:
+            code = data['resources']['code_search']
+            RATE_BUCKETS['code'].sync(code['remaining'], code['reset'])
+        if 'graphql' in data['resources']:
+            graphql = data['resources']['graphql']
+            GRAPHQL_BUDGET['remaining'] = graphql['remaining']
+            GRAPHQL_BUDGET['reset_at'] = graphql['reset']
+        
         print(f"\n{'='*70}")
         print(f"📊 RATE LIMIT STATUS:")
         print(f"   Core API: {core['remaining']}/{core['limit']} remaining")
@@ -50,223 +508,1167 @@ def check_rate_limit():
         return True
 
 # ═══════════════════════════════════════════════════════════
-# 1. 1000-RESULT-LIMIT WORKAROUND (Date + Size Slicing)
+# HTTP CACHE (ETag / Conditional Requests, LRU auf Disk)
 # ═══════════════════════════════════════════════════════════
 
-def break_1000_limit_search(base_query: str) -> Set[str]:
+class CachedResponse:
+    """Minimal-Response aus dem Cache (status_code, headers, text, json)"""
+    
+    def __init__(self, entry: Dict):
+        self.status_code = 200
+        self.headers = {'ETag': entry.get('etag') or '', 'X-From-Cache': '1'}
+        self.text = entry['body']
+    
+    def json(self):
+        return json_loads(self.text)
+
+_cache_lock = threading.Lock()
+_cache_size = None   # Bytes auf Disk, beim ersten Schreiben ermittelt
+
+def cache_key(path: str, params: Optional[Dict]) -> str:
+    """Normalisierte URL: sortierte Parameter, Whitespace in q zusammengefasst"""
+    items = []
+    for name, value in sorted((params or {}).items()):
+        if name == 'q':
+            value = ' '.join(str(value).split())
+        items.append((name, str(value)))
+    return f"{path}?{urlencode(items)}"
+
+def _cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+def cache_ttl(params: Optional[Dict]) -> float:
     """
-    UMGEHT das 1000-Result-Limit durch:
-    - Date Slicing (monatlich, wöchentlich, täglich)
-    - Size Slicing (KB-Ranges)
-    - Kombinationen
+    TTL nach Alter der Slice: abgeschlossene created:/pushed:-Ranges
+    (Ende älter als CACHE_CLOSED_AFTER) lange, alles andere kurz.
+    """
+    query = (params or {}).get('q', '')
+    ranges = re.findall(r'(?:created|pushed):(\S+?)\.\.(\d{4}-\d{2}-\d{2})', query)
+    if not ranges:
+        return CACHE_TTL_CURRENT
     
-    Findet ALLE Repos statt nur 1000!
+    closed_before = (datetime.now(timezone.utc) - CACHE_CLOSED_AFTER).date()
+    if all(date.fromisoformat(end) < closed_before for _, end in ranges):
+        return CACHE_TTL_HISTORICAL
+    return CACHE_TTL_CURRENT
+
+def cache_load(key: str) -> Optional[Dict]:
+    """Eintrag laden und als zuletzt benutzt markieren (mtime = LRU)"""
+    path = _cache_path(key)
+    try:
+        with open(path, 'rb') as f:
+            entry = json_loads(f.read())
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get('url') == key else None
+
+def cache_store(key: str, entry: Dict):
+    """Eintrag atomar schreiben, danach ggf. LRU-Eviction"""
+    global _cache_size
+    path = _cache_path(key)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    entry['url'] = key
+    
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, separators=(',', ':'))
+        new_size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"  ⚠️ Cache write failed: {e}")
+        return
+    
+    with _cache_lock:
+        if _cache_size is None:
+            _cache_size = sum(e.stat().st_size for e in os.scandir(CACHE_DIR) if e.name.endswith('.json'))
+        else:
+            _cache_size += new_size - old_size
+        if _cache_size > CACHE_MAX_BYTES:
+            _cache_size = cache_evict()
+
+def cache_evict() -> int:
+    """Älteste Einträge (mtime) löschen bis 80% von CACHE_MAX_BYTES"""
+    files = sorted(
+        (e.stat().st_mtime, e.stat().st_size, e.path)
+        for e in os.scandir(CACHE_DIR) if e.name.endswith('.json')
+    )
+    total = sum(size for _, size, _ in files)
+    
+    for _, size, path in files:
+        if total <= CACHE_MAX_BYTES * 0.8:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    
+    return total
+
+# ═══════════════════════════════════════════════════════════
+# METRICS (pro Phase / Query / Slice)
+# ═══════════════════════════════════════════════════════════
+
+# Aktueller Scope (phase, query, slice), wird von run_parallel an Worker vererbt
+_metric_scope = contextvars.ContextVar('metric_scope', default=('', '', ''))
+
+@contextmanager
+def metric_scope(phase: Optional[str] = None, query: Optional[str] = None,
+                 slice_name: Optional[str] = None):
     """
-    print(f"\n🔓 BREAKING 1000-LIMIT: {base_query[:50]}...")
-    all_repos = set()
+    Setzt den Scope für alle Metriken im Block. Eine neue Phase leert
+    Query + Slice, eine neue Query leert die Slice. Misst die Wall-Time.
+    """
+    current_phase, current_query, current_slice = _metric_scope.get()
+    if phase is not None:
+        current_phase, current_query, current_slice = phase, '', ''
+    if query is not None:
+        current_query, current_slice = query, ''
+    if slice_name is not None:
+        current_slice = slice_name
     
-    # ────────────────────────────────────────────────────────
-    # METHOD 1: DATE SLICING (nach Monat/Woche/Tag)
-    # ────────────────────────────────────────────────────────
+    scope = (current_phase, current_query, current_slice)
+    token = _metric_scope.set(scope)
+    started = time.monotonic()
+    try:
+        yield scope
+    finally:
+        METRICS.add('wall_seconds', time.monotonic() - started, scope=scope)
+        _metric_scope.reset(token)
+
+class RunMetrics:
+    """
+    Zähler + Latenzen pro Scope (phase, query, slice):
+    Calls, Bytes, Retries, Sleep, Budget pro Bucket, Cache-Hits,
+    neue vs. doppelte Repos. Aggregation erst beim Report.
+    """
     
-    now = datetime.now(timezone.utc)
-    start_year = 2020  # Flipper Zero Launch
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(lambda: defaultdict(float))
+        self.latencies = defaultdict(list)
+        self.known = lambda record: False   # Repo aus früheren Läufen? (setzt main)
+        self.seen = set()                   # IDs, in diesem Lauf schon gezählt
+        self.started = time.time()
     
-    # MONTHLY SLICES
-    for year in range(start_year, now.year + 1):
-        for month in range(1, 13):
-            if year == now.year and month > now.month:
-                break
-            
-            month_start = f"{year}-{month:02d}-01"
-            if month == 12:
-                month_end = f"{year + 1}-01-01"
-            else:
-                month_end = f"{year}-{month + 1:02d}-01"
-            
-            query = f"{base_query} created:{month_start}..{month_end}"
-            repos = execute_single_search(query)
-            
-            # Wenn > 900 Results → WEEKLY SLICE!
-            if len(repos) > 900:
-                print(f"    ⚠️ {month_start}: {len(repos)} results → WEEKLY SLICE")
-                repos = weekly_slice(base_query, year, month)
-            
-            all_repos.update(repos)
-            print(f"    📅 {month_start}: +{len(repos)} repos (total: {len(all_repos)})")
-            time.sleep(1)
+    def add(self, name: str, value: float = 1.0, scope: Optional[tuple] = None):
+        scope = scope or _metric_scope.get()
+        with self.lock:
+            self.counters[scope][name] += value
     
-    # ────────────────────────────────────────────────────────
-    # METHOD 2: SIZE SLICING (paralleles Suchen)
-    # ────────────────────────────────────────────────────────
+    def request(self, bucket: Optional[str], latency: float, size: int, retry: bool):
+        """Ein HTTP-Call (jeder Versuch zählt)"""
+        scope = _metric_scope.get()
+        with self.lock:
+            counters = self.counters[scope]
+            counters['calls'] += 1
+            counters['bytes'] += size
+            counters[f"budget_{bucket or 'none'}"] += 1
+            if retry:
+                counters['retries'] += 1
+            self.latencies[scope].append(latency)
     
-    size_ranges = [
-        '<10', '10..50', '50..100', '100..200', '200..500',
-        '500..1000', '1000..2000', '2000..5000', '5000..10000',
-        '10000..20000', '20000..50000', '>50000'
-    ]
+    def repos(self, records: List[Dict]):
+        """Gefundene Repos: neu = weder bekannt noch in diesem Lauf schon gesehen"""
+        unknown = [record.get('id') or record['name'] for record in records if not self.known(record)]
+        with self.lock:
+            fresh = {key for key in unknown if key not in self.seen}
+            self.seen.update(fresh)
+        self.add('repos_new', len(fresh))
+        self.add('repos_duplicate', len(records) - len(fresh))
     
-    for size_range in size_ranges:
-        query = f"{base_query} size:{size_range}"
-        repos = execute_single_search(query)
-        new_count = len(repos - all_repos)
+    def aggregate(self, depth: int) -> Dict[tuple, Dict]:
+        """Summiert alle Scopes auf die ersten `depth` Labels (1 = Phase, 2 = Query)"""
+        rows = defaultdict(lambda: {'counters': defaultdict(float), 'latencies': []})
+        with self.lock:
+            for scope, counters in self.counters.items():
+                row = rows[scope[:depth]]
+                for name, value in counters.items():
+                    # Wall-Time ist nicht additiv → nur der Scope selbst zählt
+                    if name == 'wall_seconds' and any(scope[depth:]):
+                        continue
+                    row['counters'][name] += value
+            for scope, values in self.latencies.items():
+                rows[scope[:depth]]['latencies'].extend(values)
         
-        if new_count > 0:
-            all_repos.update(repos)
-            print(f"    📦 size:{size_range}: +{new_count} new repos")
+        return {key: summarize_row(row) for key, row in rows.items()}
+    
+    def report(self) -> Dict:
+        """JSON-Run-Report: Summe, Phasen, Queries, Slices"""
+        def rows(depth: int, labels: tuple) -> List[Dict]:
+            return [
+                {**dict(zip(labels, key)), **values}
+                for key, values in sorted(self.aggregate(depth).items())
+            ]
         
-        time.sleep(1)
+        return {
+            'started': datetime.fromtimestamp(self.started, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'duration_seconds': round(time.time() - self.started, 3),
+            'total': self.aggregate(0).get((), summarize_row({'counters': {}, 'latencies': []})),
+            'phases': rows(1, ('phase',)),
+            'queries': rows(2, ('phase', 'query')),
+            'slices': rows(3, ('phase', 'query', 'slice')),
+        }
     
-    print(f"  ✅ TOTAL: {len(all_repos)} repos (broke 1000 limit!)\n")
-    return all_repos
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.latencies.clear()
+            self.seen.clear()
+            self.started = time.time()
+
+METRICS = RunMetrics()
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-Rank-Perzentil einer sortierten Liste"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def summarize_row(row: Dict) -> Dict:
+    latencies = sorted(row['latencies'])
+    summary = {name: round(value, 3) for name, value in sorted(row['counters'].items())}
+    summary['latency'] = {
+        'p50': round(percentile(latencies, 0.50), 4),
+        'p90': round(percentile(latencies, 0.90), 4),
+        'p99': round(percentile(latencies, 0.99), 4),
+        'max': round(latencies[-1], 4) if latencies else 0.0,
+        'sum': round(sum(latencies), 4),
+        'count': len(latencies),
+    }
+    return summary
+
+def _prom_labels(**labels) -> str:
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+# (Name im Report, Prometheus-Metrik, Typ, Beschreibung)
+PROM_METRICS = [
+    ('calls', 'flipper_http_requests_total', 'counter', 'HTTP-Requests inkl. Retries'),
+    ('bytes', 'flipper_http_bytes_total', 'counter', 'Empfangene Response-Bytes'),
+    ('retries', 'flipper_http_retries_total', 'counter', 'Wiederholte Requests'),
+    ('cache_hits', 'flipper_http_cache_hits_total', 'counter', 'Aus dem Disk-Cache beantwortet'),
+    ('sleep_seconds', 'flipper_sleep_seconds_total', 'counter', 'Wartezeit in Rate Limits und Backoff'),
+    ('graphql_points', 'flipper_graphql_points_total', 'counter', 'Verbrauchte GraphQL-Punkte'),
+    ('repos_new', 'flipper_repos_new_total', 'counter', 'Neu gefundene Repos'),
+    ('repos_duplicate', 'flipper_repos_duplicate_total', 'counter', 'Bereits bekannte Repos'),
+    ('incomplete', 'flipper_incomplete_slices_total', 'counter', 'Slices/Seiten ohne Ergebnis'),
+    ('wall_seconds', 'flipper_wall_seconds', 'gauge', 'Laufzeit'),
+]
 
-def weekly_slice(base_query: str, year: int, month: int) -> Set[str]:
-    """Wöchentliche Slices für dichte Monate"""
-    repos = set()
+def render_prometheus(report: Dict) -> str:
+    """Textfile-Format für den node_exporter: pro Phase und Query, Latenz pro Phase"""
+    lines = []
+    for name, metric, kind, description in PROM_METRICS:
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for row in report['phases']:
+            lines.append(f"{metric}{_prom_labels(phase=row['phase'], query='')} {float(row.get(name, 0))}")
+        for row in report['queries']:
+            if row['query']:
+                lines.append(f"{metric}{_prom_labels(phase=row['phase'], query=row['query'])} {float(row.get(name, 0))}")
     
-    import calendar
-    days_in_month = calendar.monthrange(year, month)[1]
+    budgets = sorted({name for row in report['phases'] for name in row if name.startswith('budget_')})
+    lines.append("# HELP flipper_ratelimit_consumed_total Verbrauchtes Rate-Limit-Budget pro Bucket")
+    lines.append("# TYPE flipper_ratelimit_consumed_total counter")
+    for row in report['phases']:
+        for name in budgets:
+            labels = _prom_labels(phase=row['phase'], bucket=name[len('budget_'):])
+            lines.append(f"flipper_ratelimit_consumed_total{labels} {float(row.get(name, 0))}")
     
-    for day_start in range(1, days_in_month, 7):
-        day_end = min(day_start + 6, days_in_month)
-        
-        date_start = f"{year}-{month:02d}-{day_start:02d}"
-        date_end = f"{year}-{month:02d}-{day_end:02d}"
-        
-        query = f"{base_query} created:{date_start}..{date_end}"
-        week_repos = execute_single_search(query)
-        repos.update(week_repos)
-        
-        time.sleep(0.5)
+    lines.append("# HELP flipper_http_latency_seconds Request-Latenz")
+    lines.append("# TYPE flipper_http_latency_seconds summary")
+    for row in report['phases']:
+        latency = row['latency']
+        for quantile, key in (('0.5', 'p50'), ('0.9', 'p90'), ('0.99', 'p99')):
+            labels = _prom_labels(phase=row['phase'], quantile=quantile)
+            lines.append(f"flipper_http_latency_seconds{labels} {latency[key]}")
+        lines.append(f"flipper_http_latency_seconds_sum{_prom_labels(phase=row['phase'])} {latency['sum']}")
+        lines.append(f"flipper_http_latency_seconds_count{_prom_labels(phase=row['phase'])} {latency['count']}")
     
-    return repos
+    lines.append("# HELP flipper_run_duration_seconds Dauer des letzten Laufs")
+    lines.append("# TYPE flipper_run_duration_seconds gauge")
+    lines.append(f"flipper_run_duration_seconds {report['duration_seconds']}")
+    return "\n".join(lines) + "\n"
 
-def execute_single_search(query: str, max_pages: int = 10) -> Set[str]:
-    """Einzelne Search mit Pagination"""
-    repos = set()
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_metrics() -> Dict:
+    """JSON-Report + Prometheus-Textfile schreiben (atomar), Report zurückgeben"""
+    report = METRICS.report()
+    try:
+        if METRICS_FILE:
+            _write_atomic(METRICS_FILE, json.dumps(report, indent=1))
+        if METRICS_PROM_FILE:
+            _write_atomic(METRICS_PROM_FILE, render_prometheus(report))
+    except OSError as e:
+        print(f"⚠️ Metrics konnten nicht geschrieben werden: {e}")
+    return report
+
+def print_metrics(report: Dict, top: int = 10):
+    """Kurzfassung: Zeit + Calls pro Phase, teuerste Queries mit Ertrag"""
+    print(f"\n📈 METRICS (Details: {METRICS_FILE or '-'})")
+    for row in report['phases']:
+        latency = row['latency']
+        print(f"   {row['phase'] or '-':16s} {row.get('wall_seconds', 0):8.1f}s wall "
+              f"{int(row.get('calls', 0)):6d} calls {row.get('bytes', 0) / 1024:9.0f} KB "
+              f"{row.get('sleep_seconds', 0):7.1f}s sleep  p50 {latency['p50'] * 1000:.0f}ms "
+              f"p99 {latency['p99'] * 1000:.0f}ms")
     
-    for page in range(1, max_pages + 1):
-        url = f"https://api.github.com/search/repositories?q={query}&per_page=100&page={page}"
-        
+    queries = [row for row in report['queries'] if row['query']]
+    queries.sort(key=lambda row: row.get('calls', 0), reverse=True)
+    if queries:
+        print(f"\n   💸 TEUERSTE {min(top, len(queries))} QUERIES (calls → neue Repos):")
+        for row in queries[:top]:
+            print(f"     {int(row.get('calls', 0)):5d} → {int(row.get('repos_new', 0)):5d} neu "
+                  f"({int(row.get('repos_duplicate', 0))} doppelt)  {row['query'][:55]}")
+
+# ═══════════════════════════════════════════════════════════
+# CRAWL JOURNAL (Checkpoints, Resume nach Abbruch)
+# ═══════════════════════════════════════════════════════════
+
+class CrawlJournal:
+    """
+    Append-only NDJSON-Journal aller fertigen Arbeitseinheiten:
+    - ('probe', query) → total_count
+    - ('page', query|page) → kompakte Records der Seite + total_count
+    - ('gql_page', query|page) → Records + Cursor der nächsten Seite
+    - ('code_probe' / 'code_page', query[|page]) → Code-Search-Treffer
+    - ('graphql', key) → projizierte Enrichment-Daten (auch None = existiert nicht)
+    - ('phase4', 'queries') → aus Phase 3 abgeleitete Queries
+    Ein abgebrochener Lauf wird beim nächsten Start fortgesetzt, fertige
+    Einheiten kosten dann keinen Request. Nach Erfolg wird es gelöscht.
+    Im Speicher steht pro Einheit nur der Byte-Offset ihrer Zeile; Werte
+    werden bei Bedarf aus der Datei zurückgelesen.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets = {}
+        self.file = None
+        self.reader = None
+        self.lock = threading.Lock()
+    
+    def open(self, run_started: datetime) -> datetime:
+        """Lädt ein offenes Journal (→ dessen Startzeit) oder beginnt ein neues"""
+        header = None
+        end = 0
         try:
-            resp = requests.get(url, headers=get_headers(), timeout=15)
-            
-            if resp.status_code != 200:
-                break
-            
-            data = resp.json()
-            items = data.get('items', [])
-            
-            if not items:
-                break
-            
-            for item in items:
-                repos.add(item['full_name'])
-            
-            # Wenn < 100, das war die letzte Seite
-            if len(items) < 100:
-                break
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json_loads(line)
+                    except ValueError:
+                        break   # abgeschnittene letzte Zeile nach Kill
+                    if entry['k'] == 'run':
+                        header = entry['v']
+                    else:
+                        self.offsets[(entry['k'], entry['key'])] = end
+                    end += len(line)
+        except FileNotFoundError:
+            pass
         
-        except:
-            break
+        if header and header.get('format') != JOURNAL_FORMAT:
+            print("🗑️ Journal im alten Format → neuer Lauf")
+        elif header:
+            started = datetime.strptime(header['started'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+            if run_started - started <= JOURNAL_MAX_AGE:
+                print(f"♻️ RESUME: Lauf vom {header['started']} mit {len(self.offsets)} fertigen Einheiten")
+                self.file = open(self.path, 'ab')
+                self.file.truncate(end)   # Rest einer abgeschnittenen Zeile weg
+                self.file.seek(end)
+                self.reader = open(self.path, 'rb')
+                return started
+            print(f"🗑️ Journal vom {header['started']} zu alt → neuer Lauf")
         
-        time.sleep(0.3)
+        self.offsets = {}
+        self.file = open(self.path, 'wb')
+        self.reader = open(self.path, 'rb')
+        self._append({'k': 'run', 'v': {'started': run_started.strftime('%Y-%m-%dT%H:%M:%SZ'), 'format': JOURNAL_FORMAT}})
+        return run_started
     
-    return repos
+    def has(self, kind: str, key: str) -> bool:
+        return (kind, key) in self.offsets
+    
+    def get(self, kind: str, key: str, default=None):
+        """Wert einer fertigen Einheit aus ihrer Journal-Zeile"""
+        offset = self.offsets.get((kind, key))
+        if offset is None:
+            return default
+        with self.lock:
+            self.reader.seek(offset)
+            line = self.reader.readline()
+        return json_loads(line)['v']
+    
+    def record(self, kind: str, key: str, value):
+        """Einheit als fertig markieren (no-op solange nicht geöffnet)"""
+        if self.file is None:
+            return
+        self._append({'k': kind, 'key': key, 'v': value}, (kind, key))
+    
+    def _append(self, entry: Dict, unit: Optional[tuple] = None):
+        line = (json.dumps(entry, separators=(',', ':')) + "\n").encode('utf-8')
+        with self.lock:
+            if unit is not None:
+                self.offsets[unit] = self.file.tell()
+            self.file.write(line)
+            self.file.flush()
+    
+    def finish(self):
+        """Lauf erfolgreich → Journal löschen"""
+        if self.file is not None:
+            self.file.close()
+            self.reader.close()
+            self.file = self.reader = None
+        self.offsets = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+JOURNAL = CrawlJournal(JOURNAL_FILE)
 
 # ═══════════════════════════════════════════════════════════
-# 2. ULTRA TOPIC COMBINATIONS (Machine Learning-ähnlich)
+# REPO INDEX (numerische IDs, sortiertes Array, Bloom-Filter)
 # ═══════════════════════════════════════════════════════════
 
-def discover_topic_combinations(state: Dict) -> List[str]:
+_MASK64 = (1 << 64) - 1
+
+def _splitmix64(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+class RepoIndex:
     """
-    Intelligente Topic-Kombinationen basierend auf:
-    - Co-Occurrence (welche Topics oft zusammen vorkommen)
-    - Semantic Similarity
-    - Frequency Analysis
+    Menge bekannter Repo-IDs (GitHub `id`, stabil bei Rename/Transfer):
+    - Basis: sortiertes int64-Array, beim Laden per mmap ohne Kopie
+    - neue IDs dieses Laufs in einem kleinen Delta-Set
+    - Bloom-Filter davor: die meisten unbekannten IDs kosten nur
+      BLOOM_HASHES Bit-Tests statt einer Binärsuche
+    Dateiformat: Header | IDs (int64 LE, sortiert) | Bloom-Bits
     """
-    print("\n🧠 INTELLIGENT TOPIC DISCOVERY...")
     
-    all_queries = []
+    MAGIC = b'FZRI'
+    HEADER = struct.Struct('<4sHHQQQ')   # magic, version, hashes, count, bloom_bits, capacity
     
-    # ────────────────────────────────────────────────────────
-    # BASE TOPICS (kategorisiert)
-    # ────────────────────────────────────────────────────────
+    def __init__(self, capacity: int = 1024):
+        self.ids = array('q')
+        self.added = set()
+        self.capacity = max(1024, capacity)
+        self.bloom_bits = self.capacity * BLOOM_BITS_PER_ENTRY
+        self.bloom = bytearray((self.bloom_bits + 7) // 8)
+        self.hashes = BLOOM_HASHES
+        self.lock = threading.Lock()
+        self._mmap = None
     
-    topic_categories = {
-        'device': [
-            'flipperzero', 'flipper-zero', 'flipper', 'flipper0',
-            'flipper-device', 'flipper-one'
-        ],
-        'wireless': [
-            'subghz', 'sub-ghz', '433mhz', '315mhz', '868mhz', '915mhz',
-            'rf', 'radio', 'wireless', 'remote', 'transmitter', 'receiver',
-            'ask', 'fsk', 'ook', 'gfsk', 'rolling-code', 'static-code'
-        ],
-        'nfc': [
-            'nfc', 'nfc-a', 'nfc-b', 'nfc-v', 'nfc-f',
-            'mifare', 'ntag', 'ultralight', 'desfire', 'felica',
-            'iso14443', 'iso15693', 'nfc-card', 'nfc-tag', 'emv'
-        ],
-        'rfid': [
-            'rfid', 'lf-rfid', 'hf-rfid', 'em4100', 'em4102', 'em4305',
-            'hid', 'indala', 't5577', 'fdx-b', '125khz', '13.56mhz'
-        ],
-        'infrared': [
-            'infrared', 'ir', 'ir-remote', 'ir-blaster', 'lirc',
-            'tv-remote', 'ac-remote', 'universal-remote', 'pronto'
-        ],
-        'ibutton': [
-            'ibutton', 'dallas-key', 'one-wire', '1-wire',
-            'ds1990', 'ds1992', 'ds1993', 'maxim'
-        ],
-        'badusb': [
-            'badusb', 'bad-usb', 'rubber-ducky', 'ducky-script',
-            'hid-attack', 'usb-attack', 'payload', 'keystroke',
-            'digispark', 'teensy', 'bash-bunny'
-        ],
-        'app': [
-            'fap', 'flipper-app', 'flipper-application', 'flipper-plugin',
-            'flipper-tool', 'flipper-game', 'flipper-utility',
-            'fap-file', 'application-fam'
-        ],
-        'firmware': [
-            'firmware', 'custom-firmware', 'unleashed', 'roguemaster',
-            'momentum', 'xtreme', 'firmware-mod', 'ota', 'bootloader'
-        ],
-        'hardware': [
-            'gpio', 'uart', 'i2c', 'spi', 'usb', 'bluetooth', 'ble',
-            'wifi', 'esp32', 'cc1101', 'nrf24', 'lora'
-        ],
-        'security': [
-            'pentest', 'pentesting', 'redteam', 'security', 'hacking',
-            'exploit', 'vulnerability', 'infosec', 'cybersecurity'
-        ],
-        'dev': [
-            'sdk', 'api', 'library', 'framework', 'toolchain',
-            'debugging', 'ufbt', 'fbt', 'vscode', 'ide'
-        ]
-    }
+    @classmethod
+    def load(cls, path: str) -> 'RepoIndex':
+        """Index per mmap öffnen (leer, wenn nicht vorhanden oder defekt)"""
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return cls()
+        
+        try:
+            magic, version, hashes, count, bloom_bits, capacity = cls.HEADER.unpack_from(mapped)
+            ids_end = cls.HEADER.size + 8 * count
+            bloom_end = ids_end + (bloom_bits + 7) // 8
+            if magic != cls.MAGIC or version != 1 or len(mapped) < bloom_end:
+                raise ValueError("ungültiger Header")
+        except (struct.error, ValueError) as e:
+            print(f"⚠️ Repo-Index {path} unlesbar ({e}) → leerer Index")
+            mapped.close()
+            return cls()
+        
+        index = cls.__new__(cls)
+        index.added = set()
+        index.capacity = capacity
+        index.bloom_bits = bloom_bits
+        index.hashes = hashes
+        index.lock = threading.Lock()
+        index._mmap = mapped
+        if sys.byteorder == 'little':
+            index.ids = memoryview(mapped)[cls.HEADER.size:ids_end].cast('q')
+        else:
+            index.ids = array('q', mapped[cls.HEADER.size:ids_end])
+            index.ids.byteswap()
+        index.bloom = bytearray(mapped[ids_end:bloom_end])
+        return index
     
-    # ────────────────────────────────────────────────────────
-    # 2-TOPIC COMBINATIONS (alle Kategorien)
-    # ────────────────────────────────────────────────────────
+    def _positions(self, repo_id: int) -> List[int]:
+        h = _splitmix64(repo_id)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.bloom_bits for i in range(self.hashes)]
     
-    categories = list(topic_categories.keys())
+    def __contains__(self, repo_id) -> bool:
+        if repo_id is None:
+            return False
+        bloom = self.bloom
+        for pos in self._positions(repo_id):
+            if not bloom[pos >> 3] & (1 << (pos & 7)):
+                return False
+        if repo_id in self.added:
+            return True
+        i = bisect.bisect_left(self.ids, repo_id)
+        return i < len(self.ids) and self.ids[i] == repo_id
     
-    # Device + Everything
-    for device in topic_categories['device'][:3]:
-        for category, topics in topic_categories.items():
-            if category == 'device':
-                continue
-            for topic in topics[:5]:
-                all_queries.append(f"topic:{device} topic:{topic} archived:false")
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.added)
     
-    # Cross-Category (logische Paare)
-    logical_pairs = [
-        ('wireless', 'security'),
-        ('nfc', 'security'),
-        ('badusb', 'security'),
+    def add(self, repo_id: int) -> bool:
+        """ID aufnehmen, True wenn sie neu war"""
+        with self.lock:
+            if repo_id is None or repo_id in self:
+                return False
+            self.added.add(repo_id)
+            for pos in self._positions(repo_id):
+                self.bloom[pos >> 3] |= 1 << (pos & 7)
+            return True
+    
+    def save(self, path: str):
+        """Delta einmischen und atomar schreiben, Bloom bei Überlauf neu bauen"""
+        if not self.added and os.path.exists(path):
+            return
+        
+        merged = array('q', sorted(itertools.chain(self.ids, self.added)))
+        if len(merged) > self.capacity:
+            rebuilt = RepoIndex(capacity=len(merged) * 2)
+            for repo_id in merged:
+                for pos in rebuilt._positions(repo_id):
+                    rebuilt.bloom[pos >> 3] |= 1 << (pos & 7)
+            self.capacity, self.bloom_bits, self.bloom = rebuilt.capacity, rebuilt.bloom_bits, rebuilt.bloom
+        
+        data = array('q', merged)
+        if sys.byteorder != 'little':
+            data.byteswap()
+        
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, 1, self.hashes, len(merged), self.bloom_bits, self.capacity))
+            f.write(data.tobytes())
+            f.write(self.bloom)
+        os.replace(tmp_path, path)
+        
+        self.ids = merged
+        self.added = set()
+
+def record_key(record: Dict) -> str:
+    """Schlüssel in der Records-Datei: Repo-ID, für Alt-Records ohne ID der Name"""
+    return str(record['id']) if record.get('id') is not None else f"name:{record['name']}"
+
+def load_records(state: Dict) -> Dict[str, Dict]:
+    """Kompakte Records aller bekannten Repos (lazy, erst wenn Phase 3 sie braucht)"""
+    if state['records'] is None:
+        try:
+            with open(REPO_RECORDS_FILE, 'rb') as f:
+                state['records'] = json_loads(f.read())
+        except FileNotFoundError:
+            state['records'] = {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Records konnten nicht geladen werden ({e})")
+            state['records'] = {}
+    return state['records']
+
+def remember_repos(state: Dict, records):
+    """Records übernehmen (nach ID, Alt-Eintrag unter dem Namen fällt weg)"""
+    stored = load_records(state)
+    for record in records:
+        stored[record_key(record)] = record
+        if record.get('id') is not None:
+            stored.pop(f"name:{record['name']}", None)
+
+def is_known(state: Dict, record: Dict) -> bool:
+    """Schon in einem früheren Lauf gefunden? (ID, Alt-Records über den Namen)"""
+    return record.get('id') in state['index'] or record['name'] in state['legacy_names']
+
+# ═══════════════════════════════════════════════════════════
+# STATE (persistent zwischen den Läufen)
+# ═══════════════════════════════════════════════════════════
+
+def load_state() -> Dict:
+    """
+    Lädt den State aus STATE_FILE:
+    - index: IDs aller bisher gefundenen Repos (REPO_INDEX_FILE, mmap)
+    - records: kompakte Records dazu (REPO_RECORDS_FILE, lazy über load_records)
+    - legacy_names: Alt-Repos ohne bekannte ID (bis sie mit ID wieder auftauchen)
+    - enriched: pushed_at beim letzten GraphQL-Enrichment pro Repo
+    - posted_events: bereits gemeldete Events (Hash → Lauf, älteste zuerst)
+    - fingerprints: letzter gesehener Release/Tag/Commit pro Repo
+    - outbox: Events, die noch nicht an Telegram gingen
+    - watermarks: pro Query der Zeitpunkt des letzten erfolgreichen Laufs
+    - query_stats: pro normalisierter Query Results/Calls/neue Repos + Yield-Historie
+    - run_count: Anzahl der Läufe (Zeitachse für pausierte Queries)
+    - graph_expanded: pro Repo der Lauf der letzten Graph-Expansion
+    - refresh_due: pro enrichtem Repo der Zeitpunkt des nächsten Refreshs (Epoch)
+    """
+    state = {'index': RepoIndex.load(REPO_INDEX_FILE), 'records': None, 'legacy_names': set(),
+             'enriched': {}, 'posted_events': {}, 'fingerprints': {},
+             'outbox': [], 'watermarks': {}, 'query_stats': {}, 'run_count': 0,
+             'graph_expanded': {}, 'refresh_due': {}}
+    
+    try:
+        with open(STATE_FILE, 'rb') as f:
+            data = json_loads(f.read())
+    except FileNotFoundError:
+        return state
+    except (OSError, ValueError) as e:
+        print(f"⚠️ State konnte nicht geladen werden ({e}) → Full Crawl")
+        return state
+    
+    known = data.get('known_repos')
+    if known is not None:
+        # Altes Format: Records im State (name → Record) oder nur Namen
+        if isinstance(known, list):
+            known = {name: {'name': name} for name in known}
+        records = load_records(state)
+        for record in known.values():
+            records[record_key(record)] = record
+            if record.get('id') is None:
+                state['legacy_names'].add(record['name'])
+            else:
+                state['index'].add(record['id'])
+        print(f"🔄 State migriert: {len(known)} Repos → Repo-Index + Records")
+    state['legacy_names'].update(data.get('legacy_names', []))
+    state['enriched'] = data.get('enriched', {})
+    posted = data.get('posted_events', {})
+    if isinstance(posted, list):
+        posted = dict.fromkeys(posted, 0)
+    state['posted_events'] = posted
+    state['fingerprints'] = data.get('fingerprints', {})
+    state['outbox'] = data.get('outbox', [])
+    state['watermarks'] = data.get('watermarks', {})
+    state['query_stats'] = data.get('query_stats', {})
+    state['run_count'] = data.get('run_count', 0)
+    state['graph_expanded'] = data.get('graph_expanded', {})
+    # Vor dem Scheduler enrichte Repos sind sofort fällig
+    state['refresh_due'] = {**dict.fromkeys(state['enriched'], 0), **data.get('refresh_due', {})}
+    return state
+
+def save_state(state: Dict):
+    """Schreibt Index, Records (falls geladen) und State atomar (tmp-Datei + rename)"""
+    state['index'].save(REPO_INDEX_FILE)
+    if state['records'] is not None:
+        tmp_file = f"{REPO_RECORDS_FILE}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state['records'], f, separators=(',', ':'))
+        os.replace(tmp_file, REPO_RECORDS_FILE)
+    
+    data = {
+        'legacy_names': sorted(state['legacy_names']),
+        'enriched': state['enriched'],
+        'posted_events': state['posted_events'],
+        'fingerprints': state['fingerprints'],
+        'outbox': state['outbox'],
+        'watermarks': state['watermarks'],
+        'query_stats': state['query_stats'],
+        'run_count': state['run_count'],
+        'graph_expanded': state['graph_expanded'],
+        'refresh_due': state['refresh_due'],
+    }
+    
+    tmp_file = f"{STATE_FILE}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_file, STATE_FILE)
+
+def get_watermark(state: Dict, query: str) -> Optional[Dict]:
+    """Watermark einer Query: {'created': ISO, 'pushed': ISO} oder None"""
+    return state['watermarks'].get(query)
+
+def set_watermark(state: Dict, query: str, run_started: datetime):
+    """Setzt die Watermark einer Query auf den Start des aktuellen Laufs"""
+    stamp = run_started.strftime('%Y-%m-%dT%H:%M:%SZ')
+    state['watermarks'][query] = {'created': stamp, 'pushed': stamp}
+
+def watermark_since(watermark: Dict) -> date:
+    """Beginn des inkrementellen Fensters (älteste Watermark minus Überlappung)"""
+    stamp = min(watermark['created'], watermark['pushed'])
+    return (datetime.strptime(stamp, '%Y-%m-%dT%H:%M:%SZ') - WATERMARK_OVERLAP).date()
+
+def incremental_search(base_query: str, watermark: Dict, until: Optional[date] = None,
+                       on_leaf=None, on_nodes=None) -> Dict[str, Dict]:
+    """
+    Sucht nur das Fenster seit der letzten Watermark, in einem pushed:-Pass:
+    pushed_at ist nie älter als created_at (Forks liefert die Search nicht),
+    das Fenster enthält also neue Repos und ältere, die das Topic erst
+    jetzt bekommen haben. Ein created:-Pass würde nur doppelt blättern.
+    """
+    since = watermark_since(watermark)
+    repos = break_1000_limit_search(base_query, field='pushed', since=since, until=until,
+                                    on_leaf=on_leaf, on_nodes=on_nodes)
+    print(f"    ⏱️ pushed seit {since.isoformat()}: {len(repos)} repos")
+    return repos
+
+# ═══════════════════════════════════════════════════════════
+# 1. 1000-RESULT-LIMIT WORKAROUND (Date + Size Slicing)
+# ═══════════════════════════════════════════════════════════
+
+def break_1000_limit_search(base_query: str, field: str = 'created',
+                            since: Optional[date] = None, until: Optional[date] = None,
+                            on_leaf=None, on_nodes=None) -> Dict[str, Dict]:
+    """
+    UMGEHT das 1000-Result-Limit durch adaptive Bisektion:
+    - total_count billig proben (per_page=1)
+    - created:/pushed:-Range halbieren bis jedes Blatt < 1000 Results hat
+    - einzelne Tage > 1000 zusätzlich per size: halbieren
+    - leere Ranges kosten nur den einen Probe-Call ihres Eltern-Knotens
+    
+    Die Blätter laufen parallel über den HTTP-Pool, on_leaf(records)
+    bekommt jedes fertige Blatt sofort (Streaming in die Pipeline).
+    Mit SEARCH_BACKEND="graphql" gehen die vollen Nodes vorher an
+    on_nodes(nodes), das Enrichment ist dann schon erledigt.
+    Findet ALLE Repos statt nur 1000!
+    """
+    print(f"\n🔓 BREAKING 1000-LIMIT: {base_query[:50]}...")
+    all_repos = {}
+    
+    start = since or SEARCH_START
+    end = until or datetime.now(timezone.utc).date()
+    with metric_scope(slice_name=f"probe {field}"):
+        leaves = partition_search(base_query, field, start, end)
+    
+    def fetch_leaf(leaf: tuple) -> tuple:
+        # Seitenzahl aus dem total_count von Seite 1, nicht aus der (evtl. abgeleiteten) Probe
+        with metric_scope(slice_name=leaf[0][len(base_query):].strip()):
+            if SEARCH_BACKEND == 'graphql':
+                repos, nodes = execute_graphql_search(leaf[0])
+            else:
+                repos, nodes = execute_single_search(leaf[0]), []
+            METRICS.repos(list(repos.values()))
+        return repos, nodes
+    
+    for repos, nodes in iter_parallel(fetch_leaf, leaves):
+        all_repos.update(repos)
+        if on_nodes and nodes:
+            on_nodes(nodes)
+        if on_leaf:
+            on_leaf(list(repos.values()))
+    
+    print(f"  ✅ TOTAL: {len(all_repos)} repos in {len(leaves)} slices (broke 1000 limit!)\n")
+    return all_repos
+
+def partition_search(base_query: str, field: str, start: date, end: date) -> List[tuple]:
+    """
+    Zerlegt [start, end] in Slices mit < 1000 Results.
+    Gibt (query, total_count) pro Blatt zurück.
+    """
+    def render(lo: int, hi: int) -> str:
+        lo_day, hi_day = date.fromordinal(lo), date.fromordinal(hi)
+        return f"{base_query} {field}:{lo_day.isoformat()}..{hi_day.isoformat()}"
+    
+    root = (start.toordinal(), end.toordinal())
+    count = probe_total_count(render(*root))
+    if count < 0:
+        mark_incomplete(render(*root), None, "probe failed")
+        return []
+    
+    leaves = []
+    for lo, hi, leaf_count in bisect_ranges(render, root[0], root[1], count):
+        if leaf_count >= SEARCH_CAP:
+            # Einzelner Tag mit > 1000 Repos → nach Größe weiter zerlegen
+            leaves.extend(partition_size(render(lo, hi), leaf_count))
+        else:
+            leaves.append((render(lo, hi), leaf_count))
+    
+    return leaves
+
+def partition_size(query: str, count: int, lo: int = 0, hi: int = SIZE_MAX) -> List[tuple]:
+    """Bisektion über size: (KB) für Slices, die per Datum nicht teilbar sind"""
+    def render(lo: int, hi: int) -> str:
+        return f"{query} size:{lo}..{hi}"
+    
+    leaves = []
+    for lo, hi, leaf_count in bisect_ranges(render, lo, hi, count):
+        if leaf_count >= SEARCH_CAP:
+            print(f"    ⚠️ {render(lo, hi)}: {leaf_count} results, nicht weiter teilbar → max 1000")
+        leaves.append((render(lo, hi), leaf_count))
+    
+    return leaves
+
+def bisect_ranges(render, lo: int, hi: int, count: int, probe=None) -> List[tuple]:
+    """
+    Halbiert [lo, hi] level-weise bis count < 1000 oder lo == hi.
+    Pro Split wird nur die linke Hälfte geprobt (rechts = Eltern - links),
+    alle Probes eines Levels laufen parallel. Eltern und linke Hälfte
+    können aus Probes verschiedenen Alters stammen (Cache), eine rechte
+    Hälfte mit abgeleitetem count <= 0 wird deshalb selbst geprobt statt
+    verworfen. Liefert (lo, hi, count).
+    """
+    leaves = []
+    frontier = [(lo, hi, count, False)]
+    
+    while frontier:
+        splits, checks = [], []
+        for lo, hi, count, derived in frontier:
+            if count <= 0:
+                if derived:
+                    checks.append((lo, hi))
+                continue
+            if count < SEARCH_CAP or lo == hi:
+                leaves.append((lo, hi, count))
+            else:
+                splits.append((lo, (lo + hi) // 2, hi, count))
+        
+        ranges = [(lo, mid) for lo, mid, hi, count in splits] + checks
+        counts = run_parallel(lambda bounds: (probe or probe_total_count)(render(*bounds)), ranges)
+        
+        frontier = []
+        for (lo, mid, hi, count), left_count in zip(splits, counts):
+            if left_count < 0:
+                mark_incomplete(render(lo, hi), None, "probe failed")
+                continue
+            frontier.append((lo, mid, left_count, False))
+            frontier.append((mid + 1, hi, count - left_count, True))
+        
+        for (lo, hi), count in zip(checks, counts[len(splits):]):
+            if count < 0:
+                mark_incomplete(render(lo, hi), None, "probe failed")
+            elif count > 0:
+                frontier.append((lo, hi, count, False))
+    
+    return sorted(leaves)
+
+def probe_total_count(query: str) -> int:
+    """Billiger Probe-Call (per_page=1) → nur total_count, -1 bei Fehler"""
+    if JOURNAL.has('probe', query):
+        return JOURNAL.get('probe', query)
+    
+    if SEARCH_BACKEND == 'graphql':
+        result, _ = graphql_search(GRAPHQL_COUNT_QUERY, {'q': query})
+        if result is None:
+            return -1
+        JOURNAL.record('probe', query, result['repositoryCount'])
+        return result['repositoryCount']
+    
+    resp = api_get("/search/repositories", params={'q': query, 'per_page': 1}, bucket='search')
+    
+    if resp is None or resp.status_code != 200:
+        return -1
+    
+    count = response_json(resp).get('total_count', 0)
+    JOURNAL.record('probe', query, count)
+    return count
+
+def fetch_search_page(query: str, page: int, per_page: int = 100) -> Optional[tuple]:
+    """Eine Seite der Repository-Search → (items, total_count), None (+ Report) wenn auch Retries scheitern"""
+    resp = api_get(
+        "/search/repositories",
+        params={'q': query, 'per_page': per_page, 'page': page},
+        bucket='search'
+    )
+    
+    if resp is None or resp.status_code != 200:
+        reason = "no response" if resp is None else f"HTTP {resp.status_code}"
+        mark_incomplete(query, page, reason)
+        return None
+    
+    payload = response_json(resp)
+    return payload.get('items', []), payload.get('total_count', 0)
+
+def search_pages(total: int, per_page: int = 100) -> int:
+    """Seiten für total_count Results, höchstens bis zum 1000-Cap"""
+    return min(SEARCH_CAP, total) // per_page + (min(SEARCH_CAP, total) % per_page > 0)
+
+def compact_repo(item: Dict) -> Dict:
+    """Kompakter Record aus einem Search-Hit (ersetzt die GraphQL-Stats)"""
+    return {
+        'id': item.get('id'),
+        'name': item['full_name'],
+        'stars': item.get('stargazers_count', 0),
+        'forks': item.get('forks_count', 0),
+        'topics': item.get('topics', []),
+        'pushed_at': item.get('pushed_at'),
+        'created_at': item.get('created_at'),
+    }
+
+def execute_single_search(query: str) -> Dict[str, Dict]:
+    """
+    Einzelne Search mit Pagination → {full_name: Record}. Die Seitenzahl
+    kommt aus dem total_count von Seite 1; mehr als 1000 Results (Probe
+    zu alt) → Slice als unvollständig melden statt still zu kappen.
+    """
+    repos = {}
+    pages = 1
+    
+    for page in itertools.count(1):
+        unit = f"{query}|{page}"
+        entry = JOURNAL.get('page', unit)
+        
+        if entry is None:
+            result = fetch_search_page(query, page)
+            if result is None:
+                break
+            items, total = result
+            entry = {'items': [compact_repo(item) for item in items], 'total': total}
+            JOURNAL.record('page', unit, entry)
+        
+        if page == 1:
+            pages = search_pages(entry['total'])
+            if entry['total'] > SEARCH_CAP:
+                mark_incomplete(query, None, f"{entry['total']} results > {SEARCH_CAP}")
+        
+        for record in entry['items']:
+            repos[record['name']] = record
+        
+        # Letzte Seite laut total_count, oder kürzer als 100
+        if page >= pages or len(entry['items']) < 100:
+            break
+    
+    return repos
+
+# ═══════════════════════════════════════════════════════════
+# 1b. CODE-SEARCH LANE (Datei-Funde → Repos)
+# ═══════════════════════════════════════════════════════════
+
+# extension: wirkt nur in /search/code; die Code-Search braucht einen Suchbegriff.
+# .fap sind Binaries (nicht indexiert) → stattdessen das application.fam-Manifest.
+CODE_QUERIES = [
+    '"Filetype: Flipper SubGhz" extension:sub',
+    '"Filetype: Flipper NFC device" extension:nfc',
+    '"Filetype: IR signals file" extension:ir',
+    'appid filename:application.fam',
+]
+
+# Call-Stand, bis zu dem die laufende Lane /search/code benutzen darf
+CODE_BUDGET = {'until': CODE_SEARCH_BUDGET}
+
+def code_budget_left() -> int:
+    return CODE_BUDGET['until'] - REQUEST_COUNTS['code']
+
+def code_probe(query: str) -> int:
+    """total_count einer Code-Search, -1 bei Fehler oder leerem Budget"""
+    if JOURNAL.has('code_probe', query):
+        return JOURNAL.get('code_probe', query)
+    if code_budget_left() <= 0:
+        return -1
+    
+    resp = api_get("/search/code", params={'q': query, 'per_page': 1}, bucket='code')
+    if resp is None or resp.status_code != 200:
+        return -1
+    
+    count = response_json(resp).get('total_count', 0)
+    JOURNAL.record('code_probe', query, count)
+    return count
+
+def partition_code(query: str) -> List[tuple]:
+    """
+    Code-Search-Slices mit < 1000 Treffern: Bisektion über size: (Bytes),
+    eine einzelne Größe mit > 1000 Treffern zusätzlich nach path: (Rest
+    über -path:, der bleibt ggf. gekappt). Liefert (query, count).
+    """
+    def render(lo: int, hi: int) -> str:
+        return f"{query} size:{lo}..{hi}"
+    
+    count = code_probe(render(0, CODE_SIZE_MAX))
+    if count < 0:
+        mark_incomplete(query, None, "code probe failed")
+        return []
+    
+    leaves = []
+    for lo, hi, leaf_count in bisect_ranges(render, 0, CODE_SIZE_MAX, count, probe=code_probe):
+        if leaf_count < SEARCH_CAP:
+            leaves.append((render(lo, hi), leaf_count))
+            continue
+        sliced = [f"{render(lo, hi)} path:{path}" for path in CODE_PATH_SLICES]
+        sliced.append(render(lo, hi) + "".join(f" -path:{path}" for path in CODE_PATH_SLICES))
+        for leaf in sliced:
+            leaf_count = code_probe(leaf)
+            if leaf_count < 0:
+                mark_incomplete(leaf, None, "code probe failed")
+            elif leaf_count >= SEARCH_CAP:
+                mark_incomplete(leaf, None, f"{leaf_count} Treffer, nicht weiter teilbar → max {SEARCH_CAP}")
+            if leaf_count > 0:
+                leaves.append((leaf, leaf_count))
+    return leaves
+
+def execute_code_search(query: str) -> Dict[str, Optional[int]]:
+    """
+    Treffer einer Code-Search-Slice, dedupliziert auf Repos → {full_name: id}.
+    Seitenzahl aus dem total_count von Seite 1 (über 1000 hat partition_code
+    die Slice schon als unvollständig gemeldet).
+    """
+    repos = {}
+    pages = 1
+    
+    for page in itertools.count(1):
+        unit = f"{query}|{page}"
+        hits = JOURNAL.get('code_page', unit)
+        
+        if hits is None:
+            if code_budget_left() <= 0:
+                mark_incomplete(query, page, "Code-Search-Budget aufgebraucht")
+                break
+            resp = api_get("/search/code", params={'q': query, 'per_page': 100, 'page': page}, bucket='code')
+            if resp is None or resp.status_code != 200:
+                mark_incomplete(query, page, "no response" if resp is None else f"HTTP {resp.status_code}")
+                break
+            payload = response_json(resp)
+            items = payload.get('items', [])
+            hits = {}
+            for item in items:
+                repository = item.get('repository') or {}
+                if repository.get('full_name'):
+                    hits[repository['full_name']] = repository.get('id')
+            hits = {'repos': hits, 'files': len(items), 'total': payload.get('total_count', 0)}
+            JOURNAL.record('code_page', unit, hits)
+        
+        if page == 1:
+            pages = search_pages(hits['total'])
+        repos.update(hits['repos'])
+        if page >= pages or hits['files'] < 100:
+            break
+    
+    return repos
+
+class CodeSearchLane:
+    """
+    Eigene Discovery-Spur über /search/code neben der Topic-Search:
+    - eigener Bucket (10/min) und eigenes Call-Budget → kein Verdrängen
+    - size:/path:-Slicing gegen das 1000-Cap
+    - Datei-Treffer → Repos, dann ein GraphQL-Lookup pro Repo mit allen
+      Node-Feldern (Record + Events), bevor sie in die Pipeline gehen
+    """
+    
+    def __init__(self, queries: List[str] = CODE_QUERIES):
+        self.queries = queries
+        self.nodes = []
+        self.files = 0
+        self.incomplete = []
+        self.thread = threading.Thread(target=self._run, name="code-search", daemon=True)
+    
+    def start(self):
+        CODE_BUDGET['until'] = REQUEST_COUNTS['code'] + CODE_SEARCH_BUDGET
+        self.thread.start()
+        return self
+    
+    def _run(self):
+        _lane.set('code')
+        with metric_scope(phase='code_search'), track_incomplete(self.incomplete):
+            repos = {}
+            try:
+                for query in self.queries:
+                    if code_budget_left() <= 0:
+                        print(f"\n  💸 Code-Search-Budget ({CODE_SEARCH_BUDGET} calls) aufgebraucht")
+                        break
+                    print(f"\n📄 CODE-SEARCH: {query}")
+                    with metric_scope(query=query):
+                        for leaf, _ in partition_code(query):
+                            repos.update(execute_code_search(leaf))
+                
+                results = graphql_batches(sorted(repos), repo_node_fragment, REPO_NODE_NODES, unit='graphql_node')
+                self.nodes = [data for data in results.values() if data]
+            except Exception as e:
+                print(f"  ❌ Code-Search-Lane abgebrochen: {e}")
+    
+    def join(self) -> List[Dict]:
+        """Warten, dann die projizierten Repo-Nodes (→ graphql_record / absorb)"""
+        self.thread.join()
+        return self.nodes
+
+# ═══════════════════════════════════════════════════════════
+# 2. ULTRA TOPIC COMBINATIONS (Machine Learning-ähnlich)
+# ═══════════════════════════════════════════════════════════
+
+def discover_topic_combinations(state: Dict) -> List[str]:
+    """
+    Intelligente Topic-Kombinationen basierend auf:
+    - Co-Occurrence (welche Topics oft zusammen vorkommen)
+    - Semantic Similarity
+    - Frequency Analysis
+    """
+    print("\n🧠 INTELLIGENT TOPIC DISCOVERY...")
+    
+    all_queries = []
+    
+    # ────────────────────────────────────────────────────────
+    # BASE TOPICS (kategorisiert)
+    # ────────────────────────────────────────────────────────
+    
+    topic_categories = {
+        'device': [
+            'flipperzero', 'flipper-zero', 'flipper', 'flipper0',
+            'flipper-device', 'flipper-one'
+        ],
+        'wireless': [
+            'subghz', 'sub-ghz', '433mhz', '315mhz', '868mhz', '915mhz',
+            'rf', 'radio', 'wireless', 'remote', 'transmitter', 'receiver',
+            'ask', 'fsk', 'ook', 'gfsk', 'rolling-code', 'static-code'
+        ],
+        'nfc': [
+            'nfc', 'nfc-a', 'nfc-b', 'nfc-v', 'nfc-f',
+            'mifare', 'ntag', 'ultralight', 'desfire', 'felica',
+            'iso14443', 'iso15693', 'nfc-card', 'nfc-tag', 'emv'
+        ],
+        'rfid': [
+            'rfid', 'lf-rfid', 'hf-rfid', 'em4100', 'em4102', 'em4305',
+            'hid', 'indala', 't5577', 'fdx-b', '125khz', '13.56mhz'
+        ],
+        'infrared': [
+            'infrared', 'ir', 'ir-remote', 'ir-blaster', 'lirc',
+            'tv-remote', 'ac-remote', 'universal-remote', 'pronto'
+        ],
+        'ibutton': [
+            'ibutton', 'dallas-key', 'one-wire', '1-wire',
+            'ds1990', 'ds1992', 'ds1993', 'maxim'
+        ],
+        'badusb': [
+            'badusb', 'bad-usb', 'rubber-ducky', 'ducky-script',
+            'hid-attack', 'usb-attack', 'payload', 'keystroke',
+            'digispark', 'teensy', 'bash-bunny'
+        ],
+        'app': [
+            'fap', 'flipper-app', 'flipper-application', 'flipper-plugin',
+            'flipper-tool', 'flipper-game', 'flipper-utility',
+            'fap-file', 'application-fam'
+        ],
+        'firmware': [
+            'firmware', 'custom-firmware', 'unleashed', 'roguemaster',
+            'momentum', 'xtreme', 'firmware-mod', 'ota', 'bootloader'
+        ],
+        'hardware': [
+            'gpio', 'uart', 'i2c', 'spi', 'usb', 'bluetooth', 'ble',
+            'wifi', 'esp32', 'cc1101', 'nrf24', 'lora'
+        ],
+        'security': [
+            'pentest', 'pentesting', 'redteam', 'security', 'hacking',
+            'exploit', 'vulnerability', 'infosec', 'cybersecurity'
+        ],
+        'dev': [
+            'sdk', 'api', 'library', 'framework', 'toolchain',
+            'debugging', 'ufbt', 'fbt', 'vscode', 'ide'
+        ]
+    }
+    
+    # ────────────────────────────────────────────────────────
+    # 2-TOPIC COMBINATIONS (alle Kategorien)
+    # ────────────────────────────────────────────────────────
+    
+    # Device + Everything
+    for device in topic_categories['device'][:3]:
+        for category, topics in topic_categories.items():
+            if category == 'device':
+                continue
+            for topic in topics[:5]:
+                all_queries.append(f"topic:{device} topic:{topic} archived:false")
+    
+    # Cross-Category (logische Paare)
+    logical_pairs = [
+        ('wireless', 'security'),
+        ('nfc', 'security'),
+        ('badusb', 'security'),
         ('app', 'wireless'),
         ('app', 'nfc'),
         ('firmware', 'wireless'),
@@ -305,29 +1707,15 @@ def discover_topic_combinations(state: Dict) -> List[str]:
     # ADVANCED: Topic + Qualifiers
     # ────────────────────────────────────────────────────────
     
-    qualifiers = {
-        'language': ['C', 'Python', 'Rust', 'C++', 'JavaScript'],
-        'stars': ['>5', '>10', '>20', '>50', '>100', '>200'],
-        'forks': ['>1', '>5', '>10', '>20'],
-        'size': ['<100', '100..1000', '1000..5000', '>5000']
-    }
+    # Beliebtheit/Momentum kommt aus dem Snapshot-Store, nicht aus stars:-Queries
+    languages = ['C', 'Python', 'Rust', 'C++', 'JavaScript']
     
     main_topics = topic_categories['device'][:2]
     
     for main_topic in main_topics:
         # Topic + Language
-        for lang in qualifiers['language']:
+        for lang in languages:
             all_queries.append(f"topic:{main_topic} language:{lang} archived:false")
-        
-        # Topic + Stars
-        for stars in qualifiers['stars']:
-            all_queries.append(f"topic:{main_topic} stars:{stars} archived:false")
-        
-        # Topic + Language + Stars (Triple!)
-        for lang in qualifiers['language'][:3]:
-            for stars in qualifiers['stars'][:3]:
-                query = f"topic:{main_topic} language:{lang} stars:{stars} archived:false"
-                all_queries.append(query)
     
     # ────────────────────────────────────────────────────────
     # NESTED AND/OR MEGA QUERIES
@@ -359,11 +1747,9 @@ def discover_topic_combinations(state: Dict) -> List[str]:
         f"topic:flipperzero AND pushed:>2026-01-01 AND (stars:>10 OR forks:>3) AND archived:false",
         
         # Code Quality
-        f"topic:flipper AND (language:C OR language:Rust) AND stars:>50 AND archived:false",
-        
-        # All File Types
-        f"flipper AND (extension:fap OR extension:sub OR extension:nfc OR extension:ir) AND archived:false"
+        f"topic:flipper AND (language:C OR language:Rust) AND stars:>50 AND archived:false"
     ]
+    # Datei-Typen (.sub/.nfc/.ir/.fap) laufen über die Code-Search-Lane (CODE_QUERIES)
     
     all_queries.extend(mega_queries)
     
@@ -371,232 +1757,2144 @@ def discover_topic_combinations(state: Dict) -> List[str]:
     return all_queries
 
 # ═══════════════════════════════════════════════════════════
-# 3. GRAPHQL MEGA BATCH (50 Repos/Query)
+# 2b. QUERY PLANNER (Dedup + Subsumption + Kostenschätzung)
 # ═══════════════════════════════════════════════════════════
 
-def graphql_mega_batch(repos: List[str], state: Dict) -> List[Dict]:
+# Query als CNF: frozenset von Klauseln, Klausel = frozenset von Atomen (OR)
+# Atom: (key, value) oder für Ranges (key, lo, hi) mit inklusiven Grenzen
+RANGE_QUALIFIERS = {'stars', 'forks', 'size', 'created', 'pushed'}
+CASE_INSENSITIVE = {'topic', 'language', 'text', 'archived'}
+
+# Grobe Vorannahme für unbekannte Queries (Results bei einer einzelnen Klausel)
+PRIOR_RESULTS = 400
+
+def _range_value(key: str, value: str) -> int:
+    if key in ('created', 'pushed'):
+        return date.fromisoformat(value[:10]).toordinal()
+    return int(value)
+
+def parse_range(key: str, spec: str) -> tuple:
+    """'>5', '>=5', '<100', '10..50', '*..2020-01-01' → (key, lo, hi)"""
+    lo, hi = float('-inf'), float('inf')
+    
+    if '..' in spec:
+        a, b = spec.split('..', 1)
+        if a != '*':
+            lo = _range_value(key, a)
+        if b != '*':
+            hi = _range_value(key, b)
+    elif spec.startswith('>='):
+        lo = _range_value(key, spec[2:])
+    elif spec.startswith('>'):
+        lo = _range_value(key, spec[1:]) + 1
+    elif spec.startswith('<='):
+        hi = _range_value(key, spec[2:])
+    elif spec.startswith('<'):
+        hi = _range_value(key, spec[1:]) - 1
+    else:
+        lo = hi = _range_value(key, spec)
+    
+    return (key, lo, hi)
+
+def parse_atom(token: str) -> tuple:
+    """Einzelnes Token → normalisiertes Atom"""
+    key, sep, value = token.partition(':')
+    if not sep:
+        return ('text', token.lower())
+    
+    key = key.lower()
+    if key in RANGE_QUALIFIERS:
+        try:
+            return parse_range(key, value)
+        except ValueError:
+            pass
+    if key in CASE_INSENSITIVE:
+        value = value.lower()
+    return (key, value)
+
+def parse_query(query: str) -> frozenset:
     """
-    GraphQL Batch = 50 Repos in 1 Request!
-    Holt: Releases, Topics, Stats, Tags
+    Search-Query → CNF. Leerzeichen und AND verknüpfen Klauseln,
+    (a OR b) wird eine Klausel, NOT x gilt wie -x. Gemischte oder
+    negierte Gruppen bleiben als Ganzes ein opakes Atom (nie
+    fälschlich subsumiert).
     """
-    print(f"\n🔥 GRAPHQL MEGA BATCH ({len(repos)} repos)...")
+    clauses = set()
+    group = None
+    negate = False
     
-    all_data = []
+    for token in re.findall(r'\(|\)|[^\s()]+', query):
+        if token == '(':
+            group = []
+        elif token == ')':
+            if group is not None:
+                operators = {t for t in group if t in ('AND', 'OR', 'NOT')}
+                atoms = [t for t in group if t not in ('AND', 'OR')]
+                if negate or 'NOT' in operators or operators == {'AND', 'OR'}:
+                    clauses.add(frozenset([('raw', ('NOT ' if negate else '') + ' '.join(group))]))
+                elif operators == {'AND'}:
+                    clauses.update(frozenset([parse_atom(t)]) for t in atoms)
+                else:
+                    clauses.add(frozenset(parse_atom(t) for t in atoms))
+            group = None
+            negate = False
+        elif group is not None:
+            group.append(token)
+        elif token == 'NOT':
+            negate = True
+        elif token not in ('AND', 'OR'):
+            clauses.add(frozenset([parse_atom('-' + token if negate else token)]))
+            negate = False
     
-    for batch_start in range(0, len(repos), 50):
-        batch = repos[batch_start:batch_start + 50]
-        
-        # Build Dynamic GraphQL Query
-        queries = []
-        for i, repo in enumerate(batch):
-            try:
-                owner, name = repo.split('/')
-                queries.append(f"""
-                r{i}: repository(owner: "{owner}", name: "{name}") {{
-                    nameWithOwner
-                    stargazerCount
-                    forkCount
-                    pushedAt
-                    createdAt
-                    
-                    repositoryTopics(first: 20) {{
-                        nodes {{
-                            topic {{ name }}
-                        }}
-                    }}
-                    
-                    releases(first: 5, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
-                        nodes {{
-                            tagName
-                            name
-                            publishedAt
-                            url
-                            isPrerelease
-                        }}
-                    }}
-                    
-                    refs(refPrefix: "refs/tags/", first: 10, orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}) {{
-                        nodes {{
-                            name
-                            target {{
-                                ... on Commit {{
-                                    committedDate
-                                }}
-                            }}
-                        }}
-                    }}
-                    
-                    defaultBranchRef {{
-                        target {{
-                            ... on Commit {{
-                                history(first: 5) {{
-                                    nodes {{
-                                        message
-                                        committedDate
-                                    }}
-                                }}
-                            }}
-                        }}
-                    }}
-                }}
-                """)
-            except:
-                continue
-        
-        if not queries:
-            continue
-        
-        full_query = "query { " + "\n".join(queries) + " }"
-        
-        try:
-            resp = requests.post(
-                "https://api.github.com/graphql",
-                json={"query": full_query},
-                headers={**get_headers(), "Accept": "application/vnd.github.v4+json"},
-                timeout=30
-            )
-            
-            if resp.status_code == 200:
-                data = resp.json().get('data', {})
-                
-                for key, value in data.items():
-                    if value and value.get('nameWithOwner'):
-                        all_data.append(value)
-                
-                print(f"  ✅ Batch {batch_start//50 + 1}: {len(batch)} repos")
-            
-            time.sleep(2)
-        
-        except Exception as e:
-            print(f"  ❌ Batch error: {e}")
+    return frozenset(clauses)
+
+def normalize_query(query: str) -> str:
+    """Kanonische Schreibweise: äquivalente Queries → gleicher String"""
+    def render_atom(atom: tuple) -> str:
+        if len(atom) == 3:
+            return f"{atom[0]}:{atom[1]}..{atom[2]}"
+        return f"{atom[0]}:{atom[1]}"
     
-    print(f"  → {len(all_data)} repos with full data!")
-    return all_data
+    rendered = []
+    for clause in parse_query(query):
+        atoms = sorted(render_atom(a) for a in clause)
+        rendered.append(atoms[0] if len(atoms) == 1 else "(" + " OR ".join(atoms) + ")")
+    return " ".join(sorted(rendered))
+
+def atom_implies(a: tuple, b: tuple) -> bool:
+    """Jedes Repo, das a erfüllt, erfüllt auch b"""
+    if a[0] != b[0] or len(a) != len(b):
+        return False
+    if len(a) == 3:
+        return b[1] <= a[1] and a[2] <= b[2]
+    return a[1] == b[1]
+
+def query_subsumes(wide: frozenset, narrow: frozenset) -> bool:
+    """
+    Results(narrow) ⊆ Results(wide): jede Klausel von `wide` muss von
+    einer Klausel von `narrow` impliziert werden.
+    """
+    return all(
+        any(all(any(atom_implies(a, b) for b in wide_clause) for a in narrow_clause)
+            for narrow_clause in narrow)
+        for wide_clause in wide
+    )
+
+def estimate_query(query: str, state: Dict, incremental: bool) -> Dict:
+    """
+    Geschätzte Search-Calls und neue Repos einer Query.
+    Nutzt query_stats früherer Läufe, sonst eine Vorannahme aus der
+    Anzahl der Klauseln (jede AND-Klausel halbiert, OR verbreitert).
+    """
+    stats = state.get('query_stats', {}).get(normalize_query(query))
+    
+    if stats:
+        results = stats['results']
+    else:
+        results = PRIOR_RESULTS
+        for clause in parse_query(query):
+            if clause != frozenset([('archived', 'false')]):
+                results *= len(clause) / 2
+        results = int(results * 2)
+    
+    if incremental:
+        expected_new = stats['new'] if stats else 1
+        cost = 1 + (expected_new + 99) // 100
+    else:
+        leaves = max(1, -(-results // 900))
+        cost = (2 * leaves - 1) + max(1, -(-results // 100))
+        expected_new = results if not len(state['index']) else results // 2
+    
+    # Gemessene Calls des letzten Laufs im gleichen Modus schlagen die Schätzung
+    if stats and stats.get('incremental') == incremental and stats.get('calls'):
+        cost = stats['calls']
+    
+    return {'query': query, 'cost': cost, 'expected_new': expected_new,
+            'incremental': incremental}
+
+def plan_queries(queries: List[str], state: Dict, executed: List[str] = (),
+                 full: bool = False) -> List[Dict]:
+    """
+    Query-Plan:
+    1. äquivalente Queries zusammenfassen (gleiche CNF)
+    2. Queries streichen, deren Results in einer bereits ausgeführten
+       (oder eingeplanten) Query komplett enthalten sind
+    3. Queries, die eine andere Kandidaten-Query abdeckt, bleiben drin,
+       merken sich die abdeckenden aber in covered_by → allocate_budget
+       streicht sie erst, wenn eine davon wirklich eingeplant ist
+    4. nach erwarteten neuen Repos pro API-Call sortieren
+    """
+    unique = {}
+    for query in queries:
+        unique.setdefault(parse_query(query), query)
+    
+    covering = [parse_query(q) for q in executed]
+    candidates = list(unique)
+    kept = []
+    dropped = covered = 0
+    
+    for i, cnf in enumerate(candidates):
+        if any(query_subsumes(other, cnf) for other in covering):
+            dropped += 1
+            continue
+        # Bei gegenseitiger Subsumption (äquivalent, andere CNF) deckt die erste die zweite ab
+        covered_by = [
+            unique[other] for j, other in enumerate(candidates)
+            if j != i and query_subsumes(other, cnf) and (j < i or not query_subsumes(cnf, other))
+        ]
+        covered += bool(covered_by)
+        query = unique[cnf]
+        incremental = not full and get_watermark(state, query) is not None
+        entry = estimate_query(query, state, incremental)
+        if covered_by:
+            entry['covered_by'] = covered_by
+        kept.append(entry)
+    
+    kept.sort(key=lambda plan: plan['expected_new'] / plan['cost'], reverse=True)
+    
+    print(f"  🧮 PLANNER: {len(queries)} queries → {len(unique)} unique → {len(kept)} "
+          f"(-{dropped} subsumed, {covered} abgedeckt), "
+          f"~{sum(p['cost'] for p in kept if 'covered_by' not in p)} search calls")
+    return kept
+
+def print_dry_run(plan: List[Dict]):
+    """--dry-run: geschätzte Kosten pro Query, ohne einen Request"""
+    total = 0
+    print(f"\n{'='*70}")
+    print("🧪 DRY RUN - geschätzte Search-Kosten")
+    for i, entry in enumerate(plan, 1):
+        total += entry['cost']
+        mode = "incr" if entry['incremental'] else "full"
+        print(f"  {i:3d}. [{mode}] ~{entry['cost']:4d} calls, ~{entry['expected_new']:5d} neu  {entry['query'][:60]}")
+    print(f"\n  Σ ~{total} Search-Calls ≈ {total / SEARCH_PER_MIN:.0f} min bei {SEARCH_PER_MIN}/min")
+    print(f"{'='*70}\n")
+
+# ═══════════════════════════════════════════════════════════
+# 2c. QUERY BUDGET (Bandit über die Yield-Historie)
+# ═══════════════════════════════════════════════════════════
+
+def query_yield(stats: Dict) -> float:
+    """Mittlerer Yield (neue Repos pro Search-Call) der letzten Läufe"""
+    recent = stats.get('recent') or [0.0]
+    return sum(recent) / len(recent)
+
+def ucb_score(stats: Dict, total_runs: int) -> float:
+    """UCB1: Yield + Bonus für selten gelaufene Queries"""
+    runs = max(1, stats.get('runs', 0))
+    return query_yield(stats) + UCB_C * (math.log(max(2, total_runs)) / runs) ** 0.5
+
+def allocate_budget(plan: List[Dict], state: Dict, budget: int) -> List[Dict]:
+    """
+    Verteilt das Search-Budget wie ein Bandit:
+    - bis EXPLORE_SHARE des Budgets für nie gelaufene Queries
+      (in Planner-Reihenfolge = geschätzter Yield)
+    - der Rest nach UCB-Score der Yield-Historie
+    - pausierte Queries (zu lange ohne neue Repos) laufen nicht
+    Übrig gebliebenes Budget geht an die jeweils andere Gruppe.
+    Abgedeckte Queries (covered_by) kommen in einer späteren Runde dran,
+    sobald über alle abdeckenden entschieden ist, und fallen nur weg, wenn
+    eine davon eingeplant wurde (nicht, wenn sie pausiert oder zu teuer war).
+    """
+    run = state.get('run_count', 0)
+    stats_by_key = state.get('query_stats', {})
+    chosen, spent, paused, covered = [], 0, 0, 0
+    
+    def take(entries: List[Dict], limit: int) -> List[Dict]:
+        nonlocal spent
+        rest = []
+        for entry in entries:
+            if spent + entry['cost'] <= limit:
+                chosen.append(entry)
+                spent += entry['cost']
+            else:
+                rest.append(entry)
+        return rest
+    
+    decided, scheduled = set(), set()
+    explored = 0
+    pending = list(plan)
+    while pending:
+        # Runde: alle Queries, über deren abdeckende Queries schon entschieden ist
+        ready = [entry for entry in pending if decided.issuperset(entry.get('covered_by', ()))] or pending
+        ready_ids = {id(entry) for entry in ready}
+        pending = [entry for entry in pending if id(entry) not in ready_ids]
+        
+        untried, tried = [], []
+        for entry in ready:
+            stats = stats_by_key.get(normalize_query(entry['query']))
+            if scheduled.intersection(entry.get('covered_by', ())):
+                covered += 1
+            elif not stats or not stats.get('runs'):
+                untried.append(entry)
+            elif stats.get('skip_until', 0) > run:
+                paused += 1
+            else:
+                tried.append((stats, entry))
+        
+        total_runs = sum(stats['runs'] for stats, _ in tried)
+        tried.sort(key=lambda pair: ucb_score(pair[0], total_runs), reverse=True)
+        exploit = [entry for _, entry in tried]
+        
+        before = len(chosen)
+        explore_limit = int(budget * EXPLORE_SHARE) if exploit else budget
+        untried = take(untried, explore_limit)
+        explored += len(chosen) - before
+        take(exploit, budget)
+        take(untried, budget)
+        
+        scheduled.update(entry['query'] for entry in chosen)
+        decided.update(entry['query'] for entry in ready)
+    
+    print(f"  🎰 BUDGET {budget} calls: {explored} explore + {len(chosen) - explored} exploit "
+          f"= {len(chosen)} queries (~{spent} calls), {paused} pausiert, {covered} abgedeckt")
+    return chosen
+
+def record_query_yield(state: Dict, key: str, calls: int, new: int, results: int, incremental: bool):
+    """
+    Historie einer Query nach einem Lauf fortschreiben. Nach RETIRE_AFTER
+    Läufen ohne neue Repos wird sie pausiert, jede weitere Null verdoppelt
+    die Pause (bis RETIRE_MAX_PAUSE Läufe).
+    """
+    stats = state['query_stats'].setdefault(key, {'results': results})
+    if not incremental:
+        stats['results'] = results
+    stats['calls'] = calls
+    stats['new'] = new
+    stats['incremental'] = incremental
+    stats['runs'] = stats.get('runs', 0) + 1
+    stats['total_calls'] = stats.get('total_calls', 0) + calls
+    stats['total_new'] = stats.get('total_new', 0) + new
+    stats['recent'] = (stats.get('recent', []) + [round(new / max(1, calls), 3)])[-YIELD_WINDOW:]
+    stats['zero_streak'] = 0 if new else stats.get('zero_streak', 0) + 1
+    
+    if stats['zero_streak'] >= RETIRE_AFTER:
+        pause = min(RETIRE_MAX_PAUSE, RETIRE_PAUSE * 2 ** (stats['zero_streak'] - RETIRE_AFTER))
+        stats['skip_until'] = state['run_count'] + pause
+    else:
+        stats.pop('skip_until', None)
 
 # ═══════════════════════════════════════════════════════════
-# 4. TOPIC CO-OCCURRENCE ANALYSIS
-# ═══════════════════════════════════════════════════════════
+# 3. GRAPHQL MEGA BATCH (50 Repos/Query)
+# ═══════════════════════════════════════════════════════════
+
+# Felder eines Repository-Nodes für die Event-Engine (Enrichment + GraphQL-Search)
+REPO_FIELDS = """
+    nameWithOwner
+    databaseId
+    pushedAt
+    
+    releases(first: 5, orderBy: {field: CREATED_AT, direction: DESC}) {
+        nodes {
+            tagName
+            name
+            publishedAt
+            url
+            isPrerelease
+        }
+    }
+    
+    refs(refPrefix: "refs/tags/", first: 10, orderBy: {field: TAG_COMMIT_DATE, direction: DESC}) {
+        nodes {
+            name
+            target {
+                ... on Commit {
+                    committedDate
+                }
+            }
+        }
+    }
+    
+    defaultBranchRef {
+        target {
+            ... on Commit {
+                history(first: 5) {
+                    nodes {
+                        oid
+                        message
+                        committedDate
+                    }
+                }
+            }
+        }
+    }
+"""
+
+# Voller Node (Search/Lookup): Record-Felder + Event-Felder
+REPO_NODE_FIELDS = """
+    stargazerCount
+    forkCount
+    createdAt
+    repositoryTopics(first: 20) { nodes { topic { name } } }""" + REPO_FIELDS
+
+# Repo-Fragment: ~1 + 5 Releases + 10 Tags + 5 Commits Knoten pro Alias (+ 20 Topics)
+REPO_FRAGMENT_NODES = 21
+REPO_NODE_NODES = REPO_FRAGMENT_NODES + 20
+
+class PayloadSpool:
+    """
+    Volle GraphQL-Antworten als gzip-NDJSON auf Disk, eine Zeile pro
+    Response. Im Speicher bleiben nur die Projektionen (project_repo),
+    die Rohdaten gibt es trotzdem für Analysen oder neue Felder.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.count = 0
+        self.lock = threading.Lock()
+    
+    def open(self, resume: bool = False):
+        """Neue Datei, beim Resume an die des abgebrochenen Laufs anhängen"""
+        if self.path:
+            self.file = gzip.open(self.path, 'ab' if resume else 'wb', compresslevel=1)
+    
+    def write(self, resp):
+        """Body unverändert anhängen (no-op solange nicht geöffnet)"""
+        if self.file is None:
+            return
+        body = resp.content if isinstance(resp, requests.Response) else resp.text.encode('utf-8')
+        # Zeilenumbrüche sind in JSON nur Whitespace (in Strings escaped) → eine Zeile
+        line = body.replace(b'\n', b' ') + b'\n'
+        with self.lock:
+            self.file.write(line)
+            self.count += 1
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            print(f"📦 {self.count} GraphQL-Antworten → {self.path}")
+
+PAYLOAD_SPOOL = PayloadSpool(PAYLOAD_SPOOL_FILE)
+
+def project_repo(node: Optional[Dict]) -> Optional[Dict]:
+    """
+    Repository-Node → kompakter Record: Record-Felder (soweit angefragt)
+    plus Releases/Tags/Commits als flache Listen mit den Feldern, die
+    Event-Engine und Scheduler lesen. Commit-Messages schrumpfen auf die
+    erste Zeile. None für fehlende Repos.
+    """
+    if not node or not node.get('nameWithOwner'):
+        return None
+    
+    record = {'id': node.get('databaseId'), 'name': node['nameWithOwner'], 'pushed_at': node.get('pushedAt')}
+    if 'stargazerCount' in node:
+        record.update({
+            'stars': node.get('stargazerCount') or 0,
+            'forks': node.get('forkCount') or 0,
+            'topics': [entry['topic']['name'] for entry in _nodes(node, 'repositoryTopics')],
+            'created_at': node.get('createdAt'),
+        })
+    if 'releases' in node:
+        record['releases'] = [
+            {'tag': release['tagName'], 'title': release.get('name') or release['tagName'],
+             'url': release.get('url'), 'at': release['publishedAt'], 'prerelease': release.get('isPrerelease', False)}
+            for release in _nodes(node, 'releases') if release.get('publishedAt')
+        ]
+        record['tags'] = [
+            {'name': tag['name'], 'at': tag['target']['committedDate']}
+            for tag in _nodes(node, 'refs') if (tag.get('target') or {}).get('committedDate')
+        ]
+        record['commits'] = [
+            {'oid': commit.get('oid'), 'title': (commit.get('message') or '').split('\n', 1)[0][:120],
+             'at': commit.get('committedDate')}
+            for commit in _nodes(node, 'defaultBranchRef', 'target', 'history')
+        ]
+    return record
+
+def repo_fragment(repo: str, fields: str = REPO_FIELDS) -> Optional[str]:
+    """GraphQL-Fragment für ein Repo (None bei ungültigem Namen)"""
+    owner, sep, name = repo.partition('/')
+    if not sep or not re.fullmatch(r'[\w.-]+', owner) or not re.fullmatch(r'[\w.-]+', name):
+        return None
+    
+    return f"""repository(owner: "{owner}", name: "{name}") {{{fields}}}"""
+
+def repo_node_fragment(repo: str) -> Optional[str]:
+    """Fragment mit allen Feldern eines Search-Nodes (Record + Events)"""
+    return repo_fragment(repo, REPO_NODE_FIELDS)
+
+def graphql_mega_batch(repos: List[str], state: Dict) -> List[Dict]:
+    """
+    GraphQL Batch = bis zu 100 Repos in 1 Request!
+    Holt nur, was die Search nicht liefert: Releases, Tags, Commits
+    (Stars/Forks/Topics/Dates stehen schon im Search-Record)
+    """
+    print(f"\n🔥 GRAPHQL MEGA BATCH ({len(repos)} repos)...")
+    
+    results = graphql_batches(repos, repo_fragment, REPO_FRAGMENT_NODES)
+    all_data = [value for value in results.values() if value]
+    
+    print(f"  → {len(all_data)} repos with full data!")
+    return all_data
+
+def graphql_batches(keys: List[str], fragment, nodes_per_key: int, unit: str = 'graphql',
+                    project=project_repo) -> Dict[str, Dict]:
+    """
+    Kosten-gesteuertes Batching für beliebige Alias-Fragmente:
+    - Batch-Größe aus Node-Limit, wächst bei schnellen Antworten,
+      halbiert sich bei Timeouts/5xx
+    - rateLimit { cost remaining resetAt } jeder Antwort → Budget
+    - Alias-Fehler (NOT_FOUND, FORBIDDEN, ...) sind endgültig → None,
+      nur Aliase ohne Antwort werden erneut (kleiner) angefragt
+    - mehrere Batches parallel, solange das Punkte-Budget reicht
+    - jeder Alias wird direkt nach dem Parsen durch `project` verkleinert,
+      der volle Payload geht nur in den PAYLOAD_SPOOL
+    Gibt {key: project(data)} zurück (None für nicht abrufbare Keys).
+    Fertige Keys landen im Journal unter `unit` und werden beim Resume
+    nicht erneut angefragt.
+    """
+    results = {key: JOURNAL.get(unit, key) for key in keys if JOURNAL.has(unit, key)}
+    pending = [key for key in keys if key not in results and fragment(key)]
+    skipped = len(keys) - len(pending) - len(results)
+    
+    size = max(1, min(GRAPHQL_MAX_ALIASES, GRAPHQL_START_ALIASES, GRAPHQL_NODE_LIMIT // nodes_per_key))
+    retries = defaultdict(int)
+    batches = []
+    
+    def refill():
+        while pending and len(batches) < MAX_WORKERS:
+            batches.append(pending[:size])
+            del pending[:size]
+    
+    refill()
+    while batches:
+        wave_cost = GRAPHQL_BUDGET['last_cost'] * len(batches)
+        if graphql_budget() - wave_cost < GRAPHQL_RESERVE:
+            wait = GRAPHQL_BUDGET['reset_at'] - time.time()
+            if 0 < wait <= GRAPHQL_RESET_WAIT:
+                print(f"  ⏳ GraphQL-Budget erschöpft → {wait:.0f}s bis zum Reset")
+                time.sleep(wait)
+                continue
+            left = sum(len(batch) for batch in batches) + len(pending)
+            print(f"  ⛔ GraphQL-Budget erschöpft ({GRAPHQL_BUDGET['remaining']} Punkte) → {left} repos offen")
+            break
+        
+        wave, batches = batches, []
+        for batch, (data, failed, duration) in zip(wave, run_parallel(
+                lambda batch: run_graphql_batch(batch, fragment, project), wave, lane='graphql')):
+            results.update(data)
+            for key, value in data.items():
+                JOURNAL.record(unit, key, value)
+            
+            if failed and len(failed) == len(batch):
+                size = max(1, len(batch) // 2)
+            elif duration < GRAPHQL_FAST_SECONDS and not failed:
+                size = min(GRAPHQL_MAX_ALIASES, GRAPHQL_NODE_LIMIT // nodes_per_key, int(size * 1.25) + 1)
+            
+            for key in failed:
+                retries[key] += 1
+            retry = [key for key in failed if retries[key] <= MAX_RETRIES]
+            for key in failed:
+                if retries[key] > MAX_RETRIES:
+                    print(f"  ❌ {key}: GraphQL aufgegeben")
+            
+            # Fehlgeschlagene Aliase in halbierten Batches erneut
+            half = max(1, min(size, (len(retry) + 1) // 2))
+            for start in range(0, len(retry), half):
+                batches.append(retry[start:start + half])
+        
+        print(f"  ✅ {len(results)}/{len(keys)} done, batch size {size}, "
+              f"{GRAPHQL_BUDGET['remaining']} Punkte übrig (last cost {GRAPHQL_BUDGET['last_cost']})")
+        refill()
+    
+    if skipped:
+        print(f"  ⚠️ {skipped} ungültige Namen übersprungen")
+    return results
+
+def run_graphql_batch(batch: List[str], fragment, project=project_repo) -> tuple:
+    """
+    Ein aliased Request. Liefert (data, failed_keys, duration):
+    data = {key: project(value)} inkl. None für Alias-Fehler (NOT_FOUND,
+    FORBIDDEN, ...), failed = ohne Antwort → erneut versuchen.
+    """
+    aliases = {f"r{i}": key for i, key in enumerate(batch)}
+    body = "\n".join(f"{alias}: {fragment(key)}" for alias, key in aliases.items())
+    full_query = "query { " + body + "\n rateLimit { cost remaining resetAt } }"
+    
+    started = time.monotonic()
+    resp = api_post("/graphql", {"query": full_query})
+    duration = time.monotonic() - started
+    
+    if resp is None or resp.status_code != 200:
+        status = resp.status_code if resp is not None else '-'
+        print(f"  ❌ Batch ({len(batch)} repos) HTTP {status} → split")
+        return {}, list(batch), duration
+    
+    try:
+        payload = response_json(resp)
+    except ValueError:
+        return {}, list(batch), duration
+    PAYLOAD_SPOOL.write(resp)
+    
+    data = payload.get('data') or {}
+    update_graphql_budget(data.get('rateLimit'))
+    
+    # Fehler pro Alias sind endgültig (NOT_FOUND, FORBIDDEN, ...) → None,
+    # nur Aliase ganz ohne Antwort werden erneut versucht
+    dropped = set()
+    for error in payload.get('errors') or []:
+        path = error.get('path') or []
+        if not path or path[0] not in aliases:
+            if not data:
+                return {}, list(batch), duration
+            continue
+        dropped.add(path[0])
+        if error.get('type') != 'NOT_FOUND':
+            print(f"  ⚠️ {aliases[path[0]]}: {error.get('type') or error.get('message')} → übersprungen")
+    
+    results, failed = {}, []
+    for alias, key in aliases.items():
+        if alias in dropped:
+            results[key] = None
+        elif alias not in data:
+            failed.append(key)
+        else:
+            results[key] = project(data[alias])
+    
+    return results, failed, duration
+
+def graphql_budget() -> int:
+    """Rest-Punkte; nach resetAt ist das Stundenbudget wieder voll (bis die nächste Antwort korrigiert)"""
+    with _graphql_lock:
+        if GRAPHQL_BUDGET['reset_at'] and time.time() >= GRAPHQL_BUDGET['reset_at']:
+            GRAPHQL_BUDGET['remaining'] = GRAPHQL_POINTS
+            GRAPHQL_BUDGET['reset_at'] = 0.0
+        return GRAPHQL_BUDGET['remaining']
+
+def update_graphql_budget(rate_limit: Optional[Dict]):
+    """rateLimit { cost remaining resetAt } → Budget + GraphQL-Bucket"""
+    if not rate_limit:
+        return
+    
+    reset_at = rate_limit.get('resetAt')
+    reset_epoch = None
+    if reset_at:
+        reset_epoch = datetime.strptime(reset_at, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
+    
+    with _graphql_lock:
+        GRAPHQL_BUDGET['remaining'] = rate_limit.get('remaining', GRAPHQL_BUDGET['remaining'])
+        GRAPHQL_BUDGET['last_cost'] = max(1, rate_limit.get('cost', 1))
+        if reset_epoch:
+            GRAPHQL_BUDGET['reset_at'] = reset_epoch
+    METRICS.add('graphql_points', rate_limit.get('cost', 0))
+    
+    if reset_epoch:
+        RATE_BUCKETS['graphql'].sync(GRAPHQL_BUDGET['remaining'] // GRAPHQL_BUDGET['last_cost'], reset_epoch)
+
+# ═══════════════════════════════════════════════════════════
+# 3a. GRAPHQL SEARCH (Discovery + Enrichment in einem Call)
+# ═══════════════════════════════════════════════════════════
+
+GRAPHQL_COUNT_QUERY = """query($q: String!) {
+    search(query: $q, type: REPOSITORY, first: 1) { repositoryCount }
+    rateLimit { cost remaining resetAt }
+}"""
+
+GRAPHQL_SEARCH_QUERY = """query($q: String!, $first: Int!, $after: String) {
+    search(query: $q, type: REPOSITORY, first: $first, after: $after) {
+        repositoryCount
+        pageInfo { hasNextPage endCursor }
+        nodes {
+            ... on Repository {""" + REPO_NODE_FIELDS + """}
+        }
+    }
+    rateLimit { cost remaining resetAt }
+}"""
+
+def graphql_search(query_text: str, variables: Dict) -> tuple:
+    """Ein search()-Request → (search-Objekt oder None, Fehlergrund)"""
+    if graphql_budget() < GRAPHQL_RESERVE:
+        return None, f"GraphQL-Budget erschöpft ({GRAPHQL_BUDGET['remaining']} Punkte)"
+    
+    resp = api_post("/graphql", {"query": query_text, "variables": variables}, bucket='graphql_search')
+    if resp is None or resp.status_code != 200:
+        return None, "no response" if resp is None else f"HTTP {resp.status_code}"
+    
+    try:
+        payload = response_json(resp)
+    except ValueError:
+        return None, "invalid JSON"
+    PAYLOAD_SPOOL.write(resp)
+    
+    data = payload.get('data') or {}
+    update_graphql_budget(data.get('rateLimit'))
+    if not data.get('search'):
+        errors = payload.get('errors') or [{}]
+        return None, errors[0].get('message', 'no data')
+    return data['search'], None
+
+RECORD_FIELDS = ('id', 'name', 'stars', 'forks', 'topics', 'pushed_at', 'created_at')
+
+def graphql_record(data: Dict) -> Dict:
+    """Kompakter Record (wie compact_repo) aus einem projizierten Node"""
+    return {field: data.get(field) for field in RECORD_FIELDS}
+
+def execute_graphql_search(query: str) -> tuple:
+    """
+    Wie execute_single_search, aber über GraphQL search() mit Cursor:
+    liefert ({full_name: Record}, Nodes). Die (projizierten) Nodes enthalten
+    schon Releases/Tags/Commits → kein separater Enrichment-Call nötig.
+    Aus dem Journal fortgesetzte Seiten haben nur Records (→ normales
+    Enrichment). Seitengröße halbiert sich bei Timeouts.
+    """
+    repos, nodes = {}, []
+    cursor, first = None, GRAPHQL_SEARCH_PAGE
+    fetched = 0
+    
+    for page in itertools.count(1):
+        unit = f"{query}|{page}"
+        entry = JOURNAL.get('gql_page', unit)
+        
+        while entry is None:
+            result, reason = graphql_search(GRAPHQL_SEARCH_QUERY, {'q': query, 'first': first, 'after': cursor})
+            if result is not None:
+                page_nodes = [data for data in map(project_repo, result.get('nodes') or []) if data]
+                info = result.get('pageInfo') or {}
+                entry = {
+                    'items': [graphql_record(node) for node in page_nodes],
+                    'cursor': info.get('endCursor') if info.get('hasNextPage') else None,
+                    'total': result.get('repositoryCount', 0),
+                }
+                JOURNAL.record('gql_page', unit, entry)
+                nodes.extend(page_nodes)
+            elif first > GRAPHQL_SEARCH_MIN_PAGE and not reason.startswith('GraphQL-Budget'):
+                first //= 2
+                print(f"    ↘️ {query[:50]}: {reason} → {first} Nodes pro Seite")
+            else:
+                mark_incomplete(query, page, reason)
+                return repos, nodes
+        
+        if page == 1 and entry['total'] > SEARCH_CAP:
+            mark_incomplete(query, None, f"{entry['total']} results > {SEARCH_CAP}")
+        for record in entry['items']:
+            repos[record['name']] = record
+        fetched += len(entry['items'])
+        cursor = entry['cursor']
+        # Cursor-Search liefert wie REST höchstens 1000 Results
+        if not cursor or fetched >= SEARCH_CAP:
+            break
+    
+    return repos, nodes
+
+# ═══════════════════════════════════════════════════════════
+# 3b. EVENT ENGINE (Snapshot-Diff gegen den letzten Fingerprint)
+# ═══════════════════════════════════════════════════════════
+
+def _nodes(data: Optional[Dict], *path) -> List[Dict]:
+    """Verschachtelte GraphQL-Connection → Liste der nodes (leer bei null)"""
+    for key in path:
+        data = (data or {}).get(key)
+    return (data or {}).get('nodes') or []
+
+def repo_snapshot(data: Dict) -> tuple:
+    """Releases, Tags, Commits aus einem projizierten Enrichment-Ergebnis (neueste zuerst)"""
+    return data.get('releases') or [], data.get('tags') or [], data.get('commits') or []
+
+def repo_fingerprint(data: Dict) -> Dict:
+    """Kompakter Stand: neuester Release, Tag und Commit (+ Zeitpunkte)"""
+    releases, tags, commits = repo_snapshot(data)
+    fingerprint = {}
+    if releases:
+        fingerprint['release'] = releases[0]['tag']
+        fingerprint['release_at'] = releases[0]['at']
+    if tags:
+        fingerprint['tag'] = tags[0]['name']
+        fingerprint['tag_at'] = tags[0]['at']
+    if commits:
+        fingerprint['commit'] = commits[0]['oid']
+        fingerprint['commit_at'] = commits[0]['at']
+    return fingerprint
+
+def diff_repo(name: str, old: Optional[Dict], data: Dict) -> List[Dict]:
+    """
+    Events seit dem letzten Fingerprint: neue Releases, neue Tags und
+    neue Commits (zusammengefasst). Ohne alten Fingerprint ist der
+    aktuelle Stand die Baseline → keine Events.
+    """
+    if old is None:
+        return []
+    
+    releases, tags, commits = repo_snapshot(data)
+    url = f"https://github.com/{name}"
+    events = []
+    
+    # ISO-8601 in UTC → String-Vergleich = zeitlicher Vergleich
+    for release in releases:
+        if release['tag'] == old.get('release') or release['at'] <= old.get('release_at', ''):
+            break
+        events.append({
+            'type': 'release', 'repo': name, 'key': release['tag'], 'title': release['title'],
+            'url': release['url'] or f"{url}/releases/tag/{release['tag']}",
+            'at': release['at'], 'prerelease': release['prerelease'],
+        })
+    
+    released = {event['key'] for event in events}
+    for tag in tags:
+        if tag['name'] == old.get('tag') or tag['at'] <= old.get('tag_at', ''):
+            break
+        if tag['name'] not in released:
+            events.append({'type': 'tag', 'repo': name, 'key': tag['name'], 'title': tag['name'],
+                           'url': f"{url}/releases/tag/{tag['name']}", 'at': tag['at']})
+    
+    new_commits = []
+    for commit in commits:
+        if commit['oid'] == old.get('commit') or (commit['at'] or '') <= old.get('commit_at', ''):
+            break
+        new_commits.append(commit)
+    if new_commits:
+        head = new_commits[0]
+        events.append({
+            'type': 'commits', 'repo': name, 'key': head['oid'], 'title': head['title'],
+            'url': f"{url}/commits", 'at': head['at'],
+            'count': len(new_commits),
+        })
+    
+    return events
+
+def new_repo_events(records: List[Dict]) -> List[Dict]:
+    """Ein Event pro neu entdecktem Repo"""
+    return [
+        {'type': 'new_repo', 'repo': record['name'], 'key': str(record.get('id') or record['name']),
+         'title': record['name'], 'url': f"https://github.com/{record['name']}",
+         'at': record.get('created_at'), 'stars': record.get('stars', 0),
+         'topics': record.get('topics', [])}
+        for record in records
+    ]
+
+def event_id(event: Dict) -> str:
+    """64-Bit-Hash aus Typ, Repo und Schlüssel (Tag-Name, Commit-OID, Repo-ID)"""
+    raw = f"{event['type']}|{event['repo'].lower()}|{event['key']}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+def emit_events(state: Dict, events: List[Dict]) -> List[Dict]:
+    """
+    Nur noch nicht gemeldete Events durchlassen und als gemeldet merken.
+    posted_events ist nach Einfügezeit geordnet, über POSTED_EVENTS_MAX
+    fallen die ältesten raus.
+    """
+    posted = state['posted_events']
+    fresh = []
+    for event in events:
+        event['id'] = event_id(event)
+        if event['id'] not in posted:
+            posted[event['id']] = state['run_count']
+            fresh.append(event)
+    
+    overflow = len(posted) - POSTED_EVENTS_MAX
+    if overflow > 0:
+        for key in list(itertools.islice(posted, overflow)):
+            del posted[key]
+    
+    return fresh
+
+# ═══════════════════════════════════════════════════════════
+# 4. TOPIC CO-OCCURRENCE ANALYSIS
+# ═══════════════════════════════════════════════════════════
+
+class TopicStats:
+    """
+    Integer-Encoding der Topics, Record für Record (auch über den Stream
+    der Pipeline): Topic → ID, pro Topic die aufsteigende Liste der
+    Repo-Indizes (Tids) plus Stars pro Repo/Topic.
+    """
+    
+    def __init__(self):
+        self.topic_ids = {}
+        self.topic_names = []
+        self.topic_tids = []
+        self.topic_stars = []
+        self.repo_stars = []
+    
+    @property
+    def records(self) -> int:
+        return len(self.repo_stars)
+    
+    def add(self, record: Dict):
+        tid = len(self.repo_stars)
+        stars = record.get('stars', 0) or 0
+        self.repo_stars.append(stars)
+        for topic in set(record.get('topics') or ()):
+            topic_id = self.topic_ids.get(topic)
+            if topic_id is None:
+                topic_id = self.topic_ids[topic] = len(self.topic_names)
+                self.topic_names.append(topic)
+                self.topic_tids.append([])
+                self.topic_stars.append(0)
+            self.topic_tids[topic_id].append(tid)
+            self.topic_stars[topic_id] += stars
+    
+    def encoded(self) -> tuple:
+        """(topic_names, topic_tids, topic_stars, repo_stars) für mine_encoded"""
+        return self.topic_names, self.topic_tids, self.topic_stars, self.repo_stars
+    
+    def top_combos(self, min_support: int = ITEMSET_MIN_SUPPORT, limit: int = 30) -> List[tuple]:
+        """Häufigste Paare und Tripel bisher (Eclat über die Tidsets)"""
+        mined = mine_encoded(self.encoded(), min_support, max_len=3, top_k=limit)
+        combos = [(stats['count'], topics) for length in (2, 3) for topics, stats in mined['itemsets'].get(length, [])]
+        return [topics for _, topics in heapq.nlargest(limit, combos)]
+
+def encode_topics(records: List[Dict]) -> tuple:
+    """Integer-Encoding aller Records (→ TopicStats.encoded)"""
+    stats = TopicStats()
+    for record in records:
+        stats.add(record)
+    return stats.encoded()
+
+def mine_topic_itemsets(records: List[Dict], min_support: int = ITEMSET_MIN_SUPPORT,
+                        max_len: Optional[int] = ITEMSET_MAX_LEN,
+                        top_k: int = ITEMSET_TOP_K) -> Dict:
+    """Frequent-Itemset-Mining über die Topics der Records (→ mine_encoded)"""
+    return mine_encoded(encode_topics(records), min_support, max_len, top_k)
+
+def mine_encoded(encoded: tuple, min_support: int = ITEMSET_MIN_SUPPORT,
+                 max_len: Optional[int] = ITEMSET_MAX_LEN,
+                 top_k: int = ITEMSET_TOP_K) -> Dict:
+    """
+    Frequent-Itemset-Mining (Eclat) über Topic-Kombinationen:
+    - Paare zuerst dünn zählen (nur Paare, die in einem Repo vorkommen),
+      statt alle F²/2 Kandidaten zu schneiden
+    - ab Länge 3 Tidsets als Sets, Support = len(A & B), Kosten ~ kleineres Set
+    - Erweiterungen eines Präfixes entstehen erst, wenn er vom Stack kommt,
+      nur aus Kandidaten, die mit dem letzten Item ein häufiges Paar bilden
+    - Support-Pruning: eine Kombination unter min_support wird nie erweitert
+    - beliebige Länge bis max_len (None = unbegrenzt)
+    - Top-k pro Länge über einen Heap, Stars nur für die Top-k
+    """
+    topic_names, topic_tids, topic_stars, repo_stars = encoded
+    
+    singles = {
+        topic_names[i]: {'count': len(topic_tids[i]), 'total_stars': topic_stars[i]}
+        for i in range(len(topic_names))
+    }
+    
+    # Häufige Einzel-Topics, Rang = seltenste zuerst (kleinere Suchbäume)
+    frequent = sorted((len(tids), i) for i, tids in enumerate(topic_tids) if len(tids) >= min_support)
+    topics = [i for _, i in frequent]
+    rows = [[] for _ in repo_stars]
+    for rank, i in enumerate(topics):
+        for tid in topic_tids[i]:
+            rows[tid].append(rank)
+    
+    # Paare dünn zählen: Schlüssel a * F + b mit Rang a < b
+    width = len(topics)
+    pair_counts = Counter()
+    for row in rows:
+        if len(row) > 1:
+            pair_counts.update(a * width + b for a, b in itertools.combinations(row, 2))
+    del rows
+    
+    partners = defaultdict(list)   # Rang a → häufige Partner (b > a, Support)
+    for key, count in pair_counts.items():
+        if count >= min_support:
+            partners[key // width].append((key % width, count))
+    del pair_counts
+    partner_sets = {a: {b for b, _ in pairs} for a, pairs in partners.items()}
+    
+    heaps = defaultdict(list)   # Länge → Min-Heap (count, itemset)
+    found = 0
+    
+    def push(itemset: tuple, count: int):
+        heap = heaps[len(itemset)]
+        entry = (count, itemset)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    
+    tidsets = {}
+    
+    def tidset(rank: int) -> set:
+        if rank not in tidsets:
+            tidsets[rank] = set(topic_tids[topics[rank]])
+        return tidsets[rank]
+    
+    for a in sorted(partners):
+        for b, count in partners[a]:
+            found += 1
+            push((a, b), count)
+        if max_len is not None and max_len <= 2:
+            continue
+        
+        # DFS: (Präfix, Tidset, Kandidaten); Paare bekommen beides erst beim Pop
+        stack = [((a, b), None, None) for b in sorted(partner_sets[a], reverse=True)]
+        while stack:
+            prefix, prefix_tids, candidates = stack.pop()
+            if max_len is not None and len(prefix) >= max_len:
+                continue
+            if prefix_tids is None:
+                b = prefix[1]
+                prefix_tids = tidset(a) & tidset(b)
+                candidates = sorted(partner_sets[a] & partner_sets.get(b, set()))
+            
+            extensions = []
+            for item in candidates:
+                tids = prefix_tids & tidset(item)
+                if len(tids) >= min_support:
+                    extensions.append((item, tids))
+            
+            for pos in range(len(extensions) - 1, -1, -1):
+                item, tids = extensions[pos]
+                itemset = prefix + (item,)
+                found += 1
+                push(itemset, len(tids))
+                later = partner_sets.get(item, ())
+                stack.append((itemset, tids, [c for c, _ in extensions[pos + 1:] if c in later]))
+    
+    def itemset_stars(itemset: tuple) -> int:
+        tids = set.intersection(*(tidset(rank) for rank in itemset))
+        return sum(repo_stars[tid] for tid in tids)
+    
+    itemsets = {}
+    for length, heap in heaps.items():
+        itemsets[length] = [
+            (tuple(sorted(topic_names[topics[rank]] for rank in itemset)),
+             {'count': count, 'total_stars': itemset_stars(itemset)})
+            for count, itemset in heapq.nlargest(top_k, heap)
+        ]
+    
+    return {'itemsets': itemsets, 'singles': singles, 'found': found}
 
-def analyze_topic_patterns(graphql_data: List[Dict]) -> Dict:
+def analyze_topic_patterns(records: List[Dict]) -> Dict:
     """
     Machine Learning-ähnliche Topic-Analyse:
-    - Welche Topics kommen oft zusammen vor?
+    - Welche Topics kommen oft zusammen vor (beliebig viele)?
     - Welche Kombinationen sind am beliebtesten (Stars)?
     """
     print("\n🧠 TOPIC PATTERN ANALYSIS...")
     
-    topic_pairs = defaultdict(lambda: {'count': 0, 'total_stars': 0, 'repos': []})
-    topic_triples = defaultdict(lambda: {'count': 0, 'total_stars': 0})
-    single_topics = defaultdict(lambda: {'count': 0, 'total_stars': 0})
+    mined = mine_topic_itemsets(records)
+    itemsets = mined['itemsets']
+    print(f"  ⛏️ {mined['found']} häufige Kombinationen (Support ≥ {ITEMSET_MIN_SUPPORT}) "
+          f"in {len(records)} repos")
     
-    for repo_data in graphql_data:
-        repo_name = repo_data.get('nameWithOwner')
-        stars = repo_data.get('stargazerCount', 0)
+    for length, label, limit in ((2, 'PAIRS', 20), (3, 'TRIPLES', 10)):
+        print(f"\n  🔥 TOP {limit} TOPIC {label}:")
+        for topics, stats in itemsets.get(length, [])[:limit]:
+            avg_stars = stats['total_stars'] / stats['count'] if stats['count'] > 0 else 0
+            print(f"     {' + '.join(topics)}: {stats['count']} repos, avg {int(avg_stars)} ⭐")
+    
+    larger = [entry for length in sorted(itemsets) if length > 3 for entry in itemsets[length][:5]]
+    if larger:
+        print(f"\n  🔥 TOP {len(larger)} GRÖSSERE KOMBINATIONEN:")
+        for topics, stats in larger:
+            print(f"     {' + '.join(topics)}: {stats['count']} repos")
+    
+    return {
+        'pairs': itemsets.get(2, []),
+        'triples': itemsets.get(3, []),
+        'itemsets': itemsets,
+        'singles': mined['singles']
+    }
+
+# ═══════════════════════════════════════════════════════════
+# 4b. SNAPSHOT STORE (Stars/Forks-Zeitreihen, Momentum)
+# ═══════════════════════════════════════════════════════════
+
+SNAPSHOT_COLUMNS = {'id': np.int64, 'ts': np.int64, 'stars': np.int32, 'forks': np.int32}
+
+class SnapshotStore:
+    """
+    Append-only Spalten-Store für (Repo-ID, Zeitpunkt, Stars, Forks):
+    - append() schreibt pro Lauf ein Segment (.npz, ein Array pro Spalte)
+    - scan() liest alle Segmente als nach (id, ts) sortierte Spalten,
+      optional nur ein Zeitfenster
+    - compact() fasst alle Segmente zu einem zusammen: ein Punkt pro Repo
+      und Tag, Punkte älter als die Retention fallen weg (der neueste
+      Punkt jedes Repos bleibt immer)
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    def segments(self) -> List[str]:
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith('.npz'))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in names]
+    
+    def append(self, records, ts: int) -> int:
+        """Ein Punkt pro Record mit ID, liefert die Anzahl geschriebener Zeilen"""
+        rows = [(record['id'], record.get('stars') or 0, record.get('forks') or 0)
+                for record in records if record.get('id') is not None]
+        if not rows:
+            return 0
+        ids, stars, forks = zip(*rows)
+        self._write(f"seg-{ts:012d}-{len(self.segments()):05d}.npz", {
+            'id': np.array(ids, dtype=np.int64),
+            'ts': np.full(len(rows), ts, dtype=np.int64),
+            'stars': np.array(stars, dtype=np.int32),
+            'forks': np.array(forks, dtype=np.int32),
+        })
+        return len(rows)
+    
+    def scan(self, since: Optional[int] = None, until: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Alle Punkte mit since <= ts <= until, sortiert nach (id, ts)"""
+        parts = []
+        for path in self.segments():
+            with np.load(path) as data:
+                parts.append({name: data[name] for name in SNAPSHOT_COLUMNS})
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in SNAPSHOT_COLUMNS.items()}
         
-        topics = []
-        for topic_node in repo_data.get('repositoryTopics', {}).get('nodes', []):
-            topic_name = topic_node.get('topic', {}).get('name')
-            if topic_name:
-                topics.append(topic_name)
-                
-                # Single topic stats
-                single_topics[topic_name]['count'] += 1
-                single_topics[topic_name]['total_stars'] += stars
-        
-        # Pairs
-        for i, topic1 in enumerate(topics):
-            for topic2 in topics[i+1:]:
-                pair = tuple(sorted([topic1, topic2]))
-                topic_pairs[pair]['count'] += 1
-                topic_pairs[pair]['total_stars'] += stars
-                topic_pairs[pair]['repos'].append(repo_name)
-        
-        # Triples
-        for i, topic1 in enumerate(topics):
-            for j, topic2 in enumerate(topics[i+1:], i+1):
-                for topic3 in topics[j+1:]:
-                    triple = tuple(sorted([topic1, topic2, topic3]))
-                    topic_triples[triple]['count'] += 1
-                    topic_triples[triple]['total_stars'] += stars
-    
-    # Top Patterns
-    top_pairs = sorted(topic_pairs.items(), key=lambda x: x[1]['count'], reverse=True)[:20]
-    top_triples = sorted(topic_triples.items(), key=lambda x: x[1]['count'], reverse=True)[:10]
-    
-    print("\n  🔥 TOP 20 TOPIC PAIRS:")
-    for (t1, t2), stats in top_pairs:
-        avg_stars = stats['total_stars'] / stats['count'] if stats['count'] > 0 else 0
-        print(f"     {t1} + {t2}: {stats['count']} repos, avg {int(avg_stars)} ⭐")
-    
-    print("\n  🔥 TOP 10 TOPIC TRIPLES:")
-    for (t1, t2, t3), stats in top_triples:
-        avg_stars = stats['total_stars'] / stats['count'] if stats['count'] > 0 else 0
-        print(f"     {t1} + {t2} + {t3}: {stats['count']} repos, avg {int(avg_stars)} ⭐")
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in SNAPSHOT_COLUMNS}
+        mask = np.ones(len(columns['id']), dtype=bool)
+        if since is not None:
+            mask &= columns['ts'] >= since
+        if until is not None:
+            mask &= columns['ts'] <= until
+        order = np.lexsort((columns['ts'][mask], columns['id'][mask]))
+        return {name: column[mask][order] for name, column in columns.items()}
+    
+    def compact(self, now: int, retention_days: int = SNAPSHOT_RETENTION_DAYS) -> int:
+        """Segmente zusammenfassen + ausdünnen, liefert die verbleibenden Zeilen"""
+        paths = self.segments()
+        columns = self.scan()
+        ids, day = columns['id'], columns['ts'] // 86400
+        
+        # letzter Punkt pro (Repo, Tag) bzw. pro Repo: die nächste Zeile ist anders
+        newest = np.ones(len(ids), dtype=bool)
+        newest[:-1] = ids[1:] != ids[:-1]
+        last_of_day = newest.copy()
+        last_of_day[:-1] |= day[1:] != day[:-1]
+        keep = last_of_day & ((columns['ts'] >= now - retention_days * 86400) | newest)
+        
+        name = f"base-{now:012d}.npz"
+        self._write(name, {column: values[keep] for column, values in columns.items()})
+        for path in paths:
+            if os.path.basename(path) != name:
+                os.remove(path)
+        return int(keep.sum())
+    
+    def _write(self, name: str, columns: Dict[str, np.ndarray]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(f"{path}.tmp", path)
+
+def repo_momentum(columns: Dict[str, np.ndarray], now: int,
+                  window_days: int = TREND_WINDOW_DAYS) -> Dict[str, np.ndarray]:
+    """
+    Vektorisiert über alle Repos (Spalten sortiert nach (id, ts)):
+    - velocity: Stars/Tag im letzten Fenster (0, wenn das Repo dort fehlt)
+    - acceleration: Änderung der Velocity gegenüber dem Fenster davor, pro Tag
+    - trending: Velocity relativ zur Größe (log2) + positive Beschleunigung
+    """
+    ids, ts = columns['id'], columns['ts']
+    stars = columns['stars'].astype(np.float64)
+    if not len(ids):
+        return {name: np.empty(0) for name in ('id', 'stars', 'velocity', 'acceleration', 'trending')}
+    
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)] - 1
+    groups = np.arange(len(starts), dtype=np.int64)
+    # (Gruppe, ts) als ein sortierter Schlüssel → Fenstergrenzen per searchsorted
+    key = np.repeat(groups, np.diff(np.r_[starts, len(ids)])) << 32 | ts
+    window = window_days * 86400
+    
+    def first_since(offset: int) -> np.ndarray:
+        return np.searchsorted(key, groups << 32 | (ts[ends] - offset), side='left')
+    
+    def rate(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        days = (ts[b] - ts[a]) / 86400
+        return np.where(days > 0, (stars[b] - stars[a]) / np.maximum(days, 1e-9), 0.0)
+    
+    middle, first = first_since(window), first_since(2 * window)
+    fresh = ts[ends] >= now - window
+    velocity = rate(middle, ends) * fresh
+    acceleration = (velocity - rate(first, middle) * fresh) / window_days
     
     return {
-        'pairs': topic_pairs,
-        'triples': topic_triples,
-        'singles': single_topics
+        'id': ids[ends],
+        'stars': stars[ends],
+        'velocity': velocity,
+        'acceleration': acceleration,
+        'trending': velocity / np.log2(stars[ends] + 2) + np.maximum(acceleration, 0),
     }
 
+def star_velocities(now: datetime) -> Dict[int, float]:
+    """Repo-ID → Stars/Tag aus dem Snapshot-Store (nur wachsende Repos)"""
+    stamp = int(now.timestamp())
+    momentum = repo_momentum(SnapshotStore(SNAPSHOT_DIR).scan(since=stamp - 2 * TREND_WINDOW_DAYS * 86400), stamp)
+    growing = momentum['velocity'] > 0
+    return dict(zip(momentum['id'][growing].tolist(), momentum['velocity'][growing].tolist()))
+
+def topic_momentum(momentum: Dict[str, np.ndarray], records) -> List[tuple]:
+    """Summierte Star-Velocity pro Topic → [(topic, velocity, repos)] absteigend"""
+    topic_ids, pair_repo, pair_topic, record_ids = {}, [], [], []
+    for record in records:
+        if record.get('id') is None:
+            continue
+        for topic in record.get('topics') or []:
+            pair_repo.append(len(record_ids))
+            pair_topic.append(topic_ids.setdefault(topic, len(topic_ids)))
+        record_ids.append(record['id'])
+    if not pair_topic or not len(momentum['id']):
+        return []
+    
+    record_ids = np.array(record_ids, dtype=np.int64)
+    position = np.minimum(np.searchsorted(momentum['id'], record_ids), len(momentum['id']) - 1)
+    velocity = np.where(momentum['id'][position] == record_ids, momentum['velocity'][position], 0.0)
+    
+    pair_repo, pair_topic = np.array(pair_repo), np.array(pair_topic)
+    scores = np.bincount(pair_topic, weights=velocity[pair_repo], minlength=len(topic_ids))
+    counts = np.bincount(pair_topic, minlength=len(topic_ids))
+    names = list(topic_ids)
+    return [(names[i], float(scores[i]), int(counts[i])) for i in np.argsort(-scores, kind='stable')
+            if scores[i] > 0]
+
+def analyze_momentum(state: Dict, records, now: datetime) -> Dict:
+    """Snapshot des Laufs anhängen, ggf. kompaktieren, Trending + Topic-Momentum"""
+    print("\n📈 MOMENTUM ANALYSIS...")
+    store = SnapshotStore(SNAPSHOT_DIR)
+    stamp = int(now.timestamp())
+    written = store.append(records, stamp)
+    if len(store.segments()) > SNAPSHOT_COMPACT_SEGMENTS:
+        print(f"  🗜️ Kompaktierung: {store.compact(stamp)} Punkte behalten")
+    
+    started = time.perf_counter()
+    momentum = repo_momentum(store.scan(since=stamp - 2 * TREND_WINDOW_DAYS * 86400), stamp)
+    stored = load_records(state)
+    topics = topic_momentum(momentum, stored.values())
+    print(f"  ⚡ {written} Punkte geschrieben, {len(momentum['id'])} Repos bewertet "
+          f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+    
+    top = np.argsort(-momentum['trending'], kind='stable')[:TREND_TOP]
+    trending = [
+        {'name': stored.get(str(momentum['id'][i]), {}).get('name', str(momentum['id'][i])),
+         'stars': int(momentum['stars'][i]), 'velocity': round(float(momentum['velocity'][i]), 2),
+         'acceleration': round(float(momentum['acceleration'][i]), 3)}
+        for i in top if momentum['trending'][i] > 0
+    ]
+    
+    if trending:
+        print(f"\n  🚀 TOP {len(trending)} TRENDING REPOS:")
+        for entry in trending:
+            print(f"     {entry['name']}: {entry['stars']} ⭐, +{entry['velocity']}/Tag "
+                  f"({entry['acceleration']:+}/Tag²)")
+    if topics:
+        print(f"\n  🌡️ TOP {min(TREND_TOP, len(topics))} TOPIC-MOMENTUM:")
+        for topic, velocity, repos in topics[:TREND_TOP]:
+            print(f"     {topic}: +{velocity:.1f} ⭐/Tag über {repos} repos")
+    
+    return {'trending': trending, 'topics': topics[:TREND_TOP]}
+
+# ═══════════════════════════════════════════════════════════
+# 5. TELEGRAM DISPATCH (Outbox → Digests → Token Bucket)
+# ═══════════════════════════════════════════════════════════
+
+class TelegramTransport:
+    """
+    sendMessage an einen Kanal. send() liefert (status, retry_after):
+    'sent', 'retry' (429/5xx/Netzwerk → später erneut) oder 'failed'
+    (Nachricht selbst ungültig → verwerfen).
+    """
+    
+    def __init__(self, token: str, chat_id: str):
+        self.url = f"{TELEGRAM_API_URL}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+    
+    def send(self, text: str) -> tuple:
+        try:
+            resp = _session.post(self.url, json={
+                'chat_id': self.chat_id,
+                'text': text,
+                'parse_mode': 'HTML',
+                'disable_web_page_preview': True,
+            }, timeout=30)
+        except requests.RequestException as e:
+            print(f"  ⚠️ Telegram: {e}")
+            return 'retry', None
+        
+        if resp.status_code == 200:
+            return 'sent', None
+        
+        try:
+            payload = resp.json()
+        except ValueError:
+            payload = {}
+        description = payload.get('description', resp.text[:200])
+        
+        if resp.status_code == 429:
+            return 'retry', float((payload.get('parameters') or {}).get('retry_after', 30))
+        if resp.status_code == 400:
+            print(f"  ❌ Telegram lehnt Nachricht ab: {description}")
+            return 'failed', None
+        # 401/403/404 (Token, Bot kein Admin, Kanal weg) und 5xx → nächster Lauf
+        print(f"  ⚠️ Telegram HTTP {resp.status_code}: {description}")
+        return 'retry', None
+
+class StubTransport:
+    """Lokaler Ersatz: sammelt Nachrichten, optional mit simulierten 429"""
+    
+    def __init__(self, fail_every: int = 0, retry_after: float = 1.0, quiet: bool = False):
+        self.sent = []
+        self.attempts = 0
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.quiet = quiet
+    
+    def send(self, text: str) -> tuple:
+        self.attempts += 1
+        if self.fail_every and self.attempts % self.fail_every == 0:
+            return 'retry', self.retry_after
+        self.sent.append(text)
+        if not self.quiet:
+            print(f"  📨 [stub] {text.splitlines()[0]} ({len(text)} Zeichen)")
+        return 'sent', None
+
+def make_transport():
+    """
+    Stub nur explizit (TELEGRAM_TRANSPORT=stub), sonst echter Transport mit
+    TELEGRAM_TOKEN + CHANNEL_ID. Fehlt eins davon → None: nichts senden,
+    die Events bleiben in der Outbox.
+    """
+    if TELEGRAM_TRANSPORT == 'stub':
+        return StubTransport()
+    if TELEGRAM_TOKEN and CHANNEL_ID:
+        return TelegramTransport(TELEGRAM_TOKEN, CHANNEL_ID)
+    print("  ⚠️ Kein TELEGRAM_TOKEN/CHANNEL_ID → kein Versand, Events bleiben in der Outbox")
+    return None
+
+def _html(text) -> str:
+    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+def render_event(event: Dict) -> str:
+    """Eine Zeile pro Event (HTML)"""
+    link = f'<a href="{_html(event["url"])}">{_html(event["repo"])}</a>'
+    if event['type'] == 'new_repo':
+        topics = " ".join(f"#{t.replace('-', '_')}" for t in (event.get('topics') or [])[:4])
+        return f"• {link} ⭐{event.get('stars', 0)} {_html(topics)}".rstrip()
+    if event['type'] == 'release':
+        pre = " (pre)" if event.get('prerelease') else ""
+        return f"• {link} → <b>{_html(event['title'])}</b>{pre}"
+    if event['type'] == 'tag':
+        return f"• {link} → Tag <code>{_html(event['title'])}</code>"
+    return f"• {link}: {event.get('count', 1)} Commits – {_html(event['title'])}"
+
+# Reihenfolge = Priorität: eine Flut neuer Repos verdrängt keine Releases
+DIGEST_HEADERS = {
+    'release': "🚀 <b>Neue Releases</b>",
+    'tag': "🏷️ <b>Neue Tags</b>",
+    'new_repo': "🆕 <b>Neue Flipper-Zero-Repos</b>",
+    'commits': "🛠️ <b>Neue Commits</b>",
+}
+
+def build_digests(events: List[Dict]) -> List[tuple]:
+    """
+    Fasst Events nach Typ zu Nachrichten ≤ TELEGRAM_MAX_CHARS zusammen.
+    Mehr als DIGEST_MAX_REPOS neue Repos → die mit den wenigsten Stars
+    nur noch als Anzahl. Liefert (text, event_ids) pro Nachricht.
+    """
+    by_type = defaultdict(list)
+    for event in events:
+        by_type[event['type']].append(event)
+    
+    messages = []
+    for kind, header in DIGEST_HEADERS.items():
+        group = by_type.get(kind, [])
+        if not group:
+            continue
+        if kind == 'new_repo':
+            group.sort(key=lambda e: e.get('stars', 0), reverse=True)
+        else:
+            group.sort(key=lambda e: e.get('at') or '', reverse=True)
+        
+        limit = DIGEST_MAX_REPOS if kind == 'new_repo' else len(group)
+        lines = [(render_event(event), [event['id']]) for event in group[:limit]]
+        if len(group) > limit:
+            overflow = group[limit:]
+            lines.append((f"… und {len(overflow)} weitere neue Repos mit weniger Stars",
+                          [event['id'] for event in overflow]))
+        
+        # Platz für Header, " (nn/nn)" und Leerzeile
+        budget = TELEGRAM_MAX_CHARS - len(header) - 12
+        parts, current, ids, size = [], [], [], 0
+        for line, line_ids in lines:
+            if current and size + len(line) + 1 > budget:
+                parts.append((current, ids))
+                current, ids, size = [], [], 0
+            current.append(line)
+            ids = ids + line_ids
+            size += len(line) + 1
+        parts.append((current, ids))
+        
+        for i, (part_lines, part_ids) in enumerate(parts, 1):
+            suffix = f" ({i}/{len(parts)})" if len(parts) > 1 else ""
+            messages.append((f"{header}{suffix}\n\n" + "\n".join(part_lines), part_ids))
+    
+    return messages
+
+def dispatch_events(state: Dict, events: List[Dict], transport) -> Dict:
+    """
+    Neue Events in die persistente Outbox, daraus Digests senden:
+    - Token Bucket mit TELEGRAM_PER_MIN, max. TELEGRAM_MAX_MESSAGES pro Lauf
+    - 429 → retry_after abwarten; zu lange oder wiederholt → Abbruch
+    - nicht gesendete Events bleiben für den nächsten Lauf in der Outbox
+    - transport None (keine Credentials) → nur in die Outbox
+    """
+    queued = {event['id'] for event in state['outbox']}
+    outbox = state['outbox'] + [event for event in events if event['id'] not in queued]
+    if len(outbox) > OUTBOX_MAX:
+        print(f"  ⚠️ Outbox voll → {len(outbox) - OUTBOX_MAX} älteste Events verworfen")
+        outbox = outbox[-OUTBOX_MAX:]
+    
+    if transport is None:
+        state['outbox'] = outbox
+        print(f"  📭 Versand übersprungen, {len(outbox)} Events in der Outbox")
+        return {'sent': 0, 'messages': 0, 'pending': len(outbox)}
+    
+    messages = build_digests(outbox)
+    bucket = TokenBucket(TELEGRAM_PER_MIN / 60, 1)
+    done = set()
+    sent = 0
+    
+    for text, ids in messages[:TELEGRAM_MAX_MESSAGES]:
+        for attempt in range(MAX_RETRIES + 1):
+            METRICS.add('sleep_seconds', bucket.acquire())
+            status, retry_after = transport.send(text)
+            METRICS.add(f"telegram_{status}")
+            if status != 'retry':
+                break
+            wait = retry_after if retry_after is not None else backoff_delay(attempt)
+            if wait > TELEGRAM_MAX_RETRY_WAIT or attempt == MAX_RETRIES:
+                break
+            print(f"  ⏳ Telegram: {wait:.0f}s Pause, retry {attempt + 1}/{MAX_RETRIES}")
+            bucket.pause(wait)
+        
+        if status == 'retry':
+            print(f"  ⏸️ Telegram gedrosselt/nicht erreichbar → Rest im nächsten Lauf")
+            break
+        done.update(ids)
+        sent += status == 'sent'
+    
+    state['outbox'] = [event for event in outbox if event['id'] not in done]
+    print(f"  📨 {sent}/{len(messages)} Nachrichten gesendet ({len(done)} Events), "
+          f"{len(state['outbox'])} Events in der Outbox")
+    return {'sent': sent, 'messages': len(messages), 'pending': len(state['outbox'])}
+
+# ═══════════════════════════════════════════════════════════
+# 5b. REFRESH SCHEDULER (Re-Enrichment nach Aktivität)
+# ═══════════════════════════════════════════════════════════
+
+def _epoch(stamp: Optional[str]) -> Optional[float]:
+    if not stamp:
+        return None
+    return datetime.strptime(stamp, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
+
+def refresh_interval(data: Dict, velocity: float, now: float) -> float:
+    """
+    Sekunden bis zum nächsten Enrichment:
+    - Bruchteil des Alters des letzten Pushs
+    - höchstens ein Bruchteil des mittleren Release-Abstands
+    - Star-Velocity verkürzt weiter
+    begrenzt auf [REFRESH_MIN, REFRESH_MAX]
+    """
+    pushed = _epoch(data.get('pushed_at'))
+    interval = (now - pushed) * REFRESH_PUSH_FACTOR if pushed else REFRESH_MAX
+    
+    releases = [_epoch(release['at']) for release in repo_snapshot(data)[0]]
+    if len(releases) >= 2:
+        cadence = (max(releases) - min(releases)) / (len(releases) - 1)
+        interval = min(interval, cadence * REFRESH_RELEASE_FACTOR)
+    
+    interval /= 1 + velocity / REFRESH_HOT_STARS
+    return min(REFRESH_MAX, max(REFRESH_MIN, interval))
+
+def due_repos(refresh_due: Dict[str, int], now: float, limit: int, skip) -> List[str]:
+    """Bis zu `limit` fällige Repos, am längsten überfällige zuerst (Heap)"""
+    heap = [(due, name) for name, due in refresh_due.items() if due <= now and name not in skip]
+    return [name for due, name in heapq.nsmallest(max(0, limit), heap)]
+
+# ═══════════════════════════════════════════════════════════
+# 6. STREAMING PIPELINE (Search → GraphQL → Analyse, überlappend)
+# ═══════════════════════════════════════════════════════════
+
+class RunSpool:
+    """Records dieses Laufs als NDJSON auf Disk statt im Speicher"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.count = 0
+    
+    def write(self, records: List[Dict]):
+        for record in records:
+            self.file.write(json.dumps(record, separators=(',', ':')) + "\n")
+        self.count += len(records)
+    
+    def __iter__(self):
+        self.file.flush()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json_loads(line)
+    
+    def close(self):
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+def combo_queries(combos) -> List[str]:
+    """Topic-Kombinationen → Search-Queries"""
+    return [" ".join(f"topic:{topic}" for topic in combo) + " archived:false" for combo in combos]
+
+class Pipeline:
+    """
+    Verbindet die Phasen über eine begrenzte Queue statt harter Barrieren:
+    - feed(records) bekommt jedes fertige Search-Blatt: Dedup, Spool auf
+      Disk, Topic-Statistik
+    - je ENRICH_BATCH veraltete Repos gehen sofort an den GraphQL-Thread,
+      der parallel zur Search läuft (getrennte Rate-Limit-Budgets)
+    - Enrichment-Ergebnisse werden direkt gegen den Fingerprint gedifft
+      und nicht aufbewahrt
+    - volle Queue blockiert feed() → Backpressure auf die Search
+    - GraphQL-Search-Nodes gehen über absorb_nodes() vor feed() ein und
+      landen gar nicht erst in der Queue
+    - höchstens ENRICH_BUDGET Repos pro Lauf; was darüber hinaus geändert
+      ist, wird für den nächsten Lauf fällig, due() + refresh() füllen den
+      Rest mit fälligen Repos aus dem Scheduler
+    """
+    
+    def __init__(self, state: Dict, spool_path: Optional[str] = None,
+                 velocity: Optional[Dict[int, float]] = None):
+        self.state = state
+        self.velocity = velocity or {}
+        self.queued = 0
+        self.seen = set()
+        self.pending = []
+        self.pushed = {}        # Name → pushed_at für Repos im Enrichment
+        self.stars = {}         # Name → Stars für Repos im Enrichment
+        self.seeds = []         # (Stars, Name) enrichter Repos ab GRAPH_EXPAND_STARS → Graph-Expansion
+        self.events = []
+        self.enriched = 0
+        self.topics = TopicStats()
+        self.spool = RunSpool(spool_path or RUN_SPOOL_FILE)
+        self.queue = queue.Queue(maxsize=PIPELINE_QUEUE_BATCHES)
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._enrich_worker, name="enrich", daemon=True)
+        self.thread.start()
+    
+    def feed(self, records: List[Dict]) -> int:
+        """Neue Records aus der Search, liefert die Anzahl bisher unbekannter Repos"""
+        fresh_records, unknown = [], 0
+        for record in records:
+            if record['name'] in self.seen:
+                continue
+            self.seen.add(record['name'])
+            fresh_records.append(record)
+            unknown += not is_known(self.state, record)
+            if self.state['enriched'].get(record['name']) != record.get('pushed_at'):
+                if self.queued >= ENRICH_BUDGET:
+                    with self.lock:
+                        self.state['refresh_due'][record['name']] = 0
+                    continue
+                self.queued += 1
+                with self.lock:
+                    self.pushed[record['name']] = record.get('pushed_at')
+                    self.stars[record['name']] = record.get('stars') or 0
+                self.pending.append(record['name'])
+        
+        self.spool.write(fresh_records)
+        for record in fresh_records:
+            self.topics.add(record)
+        
+        if len(self.pending) >= ENRICH_BATCH:
+            self.queue.put(self.pending)
+            self.pending = []
+        return unknown
+    
+    def due(self, now: float) -> List[str]:
+        """
+        Fällige Repos fürs Rest-Budget wählen. REPO_FIELDS liefert keine
+        Stars → die gespeicherten Records liefern sie, und beliebte fällige
+        Repos sind schon vor ihrem Refresh Graph-Seeds.
+        """
+        with self.lock:
+            skip = set(self.pushed) | set(self.pending)
+            refresh_due = dict(self.state['refresh_due'])   # Enrichment-Thread schreibt weiter hinein
+        names = due_repos(refresh_due, now, ENRICH_BUDGET - self.queued, skip)
+        wanted = set(names)
+        stars = {record['name']: record.get('stars') or 0
+                 for record in load_records(self.state).values() if record['name'] in wanted}
+        with self.lock:
+            self.stars.update(stars)
+            self.seeds.extend((count, name) for name, count in stars.items() if count >= GRAPH_EXPAND_STARS)
+        return names
+    
+    def refresh(self, names: List[str]) -> int:
+        """Rest-Budget mit den fälligen Repos aus due() füllen, liefert deren Anzahl"""
+        with self.lock:
+            skip = set(self.pushed) | set(self.pending)
+        names = [name for name in names if name not in skip][:max(0, ENRICH_BUDGET - self.queued)]
+        self.queued += len(names)
+        for start in range(0, len(names), ENRICH_BATCH):
+            self.queue.put(names[start:start + ENRICH_BATCH])
+        return len(names)
+    
+    def _enrich_worker(self):
+        with metric_scope(phase='graphql'):
+            while True:
+                batch = self.queue.get()
+                if batch is None:
+                    break
+                # Was sich inzwischen angestaut hat, in einen Lauf von graphql_batches
+                closing = False
+                while len(batch) < GRAPHQL_MAX_ALIASES * MAX_WORKERS:
+                    try:
+                        more = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if more is None:
+                        closing = True
+                        break
+                    batch = batch + more
+                
+                try:
+                    for data in graphql_mega_batch(batch, self.state):
+                        self.absorb(data)
+                except Exception as e:
+                    print(f"  ❌ Enrichment-Batch ({len(batch)} repos) fehlgeschlagen: {e}")
+                self.enriched += len(batch)
+                if closing:
+                    break
+    
+    def absorb(self, data: Dict):
+        """Ein Enrichment-Ergebnis: pushed_at merken, Fingerprint diffen"""
+        name = data['name']
+        velocity = self.velocity.get(data.get('id'), 0.0)
+        now = time.time()
+        fingerprint = repo_fingerprint(data)
+        # State-Dicts nur unter dem Lock: refresh() liest sie parallel im Main-Thread
+        with self.lock:
+            pushed_at = self.pushed.pop(name, data.get('pushed_at'))
+            stars = self.stars.pop(name, data.get('stars') or 0)
+            if stars >= GRAPH_EXPAND_STARS:
+                self.seeds.append((stars, name))
+            self.state['enriched'][name] = pushed_at
+            self.state['refresh_due'][name] = int(now + refresh_interval(data, velocity, now))
+            
+            old = self.state['fingerprints'].get(name)
+            if fingerprint != old:
+                self.events.extend(diff_repo(name, old, data))
+                self.state['fingerprints'][name] = fingerprint
+    
+    def absorb_nodes(self, nodes: List[Dict]):
+        """Nodes aus der GraphQL-Search: schon vollständig → direkt diffen"""
+        for data in nodes:
+            self.absorb(data)
+        self.enriched += len(nodes)
+    
+    def close(self) -> List[Dict]:
+        """Rest-Batch abschicken, auf das Enrichment warten, Events zurückgeben"""
+        if self.pending:
+            self.queue.put(self.pending)
+            self.pending = []
+        self.queue.put(None)
+        self.thread.join()
+        return self.events
+
+# ═══════════════════════════════════════════════════════════
+# 6b. GRAPH EXPANSION (Forks, Templates, Owner-Repos)
+# ═══════════════════════════════════════════════════════════
+
+# Felder eines Nachbarn: reicht für project_repo + Relevanz-Check
+GRAPH_NEIGHBOUR_FIELDS = """nameWithOwner databaseId stargazerCount forkCount createdAt pushedAt description
+                repositoryTopics(first: 20) { nodes { topic { name } } }"""
+
+# Pro Alias: Forks + Owner-Repos + Template, je ~21 Knoten (inkl. Topics)
+GRAPH_FRAGMENT_NODES = (GRAPH_FORKS + GRAPH_OWNER_REPOS + 1) * 21
+
+# Owner-Repos zählen nur mit Flipper-Bezug (Forks/Templates immer)
+GRAPH_RELEVANT = re.compile(r'flipper|subghz|sub-ghz|unleashed|roguemaster|xtreme|\bfap\b', re.IGNORECASE)
+
+def graph_fragment(repo: str) -> Optional[str]:
+    """Nachbarn eines Repos: Top-Forks, Template-Quelle, Top-Repos des Owners"""
+    return repo_fragment(repo, f"""
+        forks(first: {GRAPH_FORKS}, orderBy: {{field: STARGAZERS, direction: DESC}}) {{
+            nodes {{ {GRAPH_NEIGHBOUR_FIELDS} }}
+        }}
+        templateRepository {{ {GRAPH_NEIGHBOUR_FIELDS} }}
+        owner {{
+            repositories(first: {GRAPH_OWNER_REPOS}, isFork: false, orderBy: {{field: STARGAZERS, direction: DESC}}) {{
+                nodes {{ {GRAPH_NEIGHBOUR_FIELDS} }}
+            }}
+        }}""")
+
+def graph_neighbours(data: Optional[Dict]) -> List[Dict]:
+    """
+    Projektion für graph_fragment: relevante Nachbarn mit mindestens
+    GRAPH_KEEP_STARS Stars als kompakte Records (→ graphql_record)
+    """
+    if not data:
+        return []
+    candidates = _nodes(data, 'forks') + ([data['templateRepository']] if data.get('templateRepository') else [])
+    for node in _nodes(data, 'owner', 'repositories'):
+        text = " ".join([node.get('nameWithOwner') or '', node.get('description') or ''] +
+                        [entry['topic']['name'] for entry in _nodes(node, 'repositoryTopics')])
+        if GRAPH_RELEVANT.search(text):
+            candidates.append(node)
+    return [project_repo(node) for node in candidates
+            if node and node.get('nameWithOwner') and (node.get('stargazerCount') or 0) >= GRAPH_KEEP_STARS]
+
+def expand_graph(state: Dict, seeds: List[str], visited: set, budget: int = GRAPH_NODE_BUDGET) -> List[Dict]:
+    """
+    Breitensuche ab den enrichten Repos:
+    - je Level ein graphql_batches-Lauf (ein Alias expandiert ein Repo)
+    - visited: in diesem Lauf schon gesehene Repos werden nicht neu gemeldet
+    - weiter expandiert wird nur bis GRAPH_MAX_DEPTH und ab GRAPH_EXPAND_STARS,
+      Repos erst wieder nach GRAPH_REFRESH_RUNS Läufen
+    - budget = max. expandierte Repos pro Lauf
+    Liefert die neu entdeckten Nachbarn (projiziert, → graphql_record).
+    """
+    run = state['run_count']
+    expanded = state['graph_expanded']
+    for name in [name for name, last in expanded.items() if run - last >= GRAPH_REFRESH_RUNS]:
+        del expanded[name]
+    
+    level = [name for name in dict.fromkeys(seeds) if name not in expanded]   # Seeds: beliebteste zuerst
+    found = []
+    
+    for depth in range(GRAPH_MAX_DEPTH):
+        level = level[:budget]
+        if not level:
+            break
+        budget -= len(level)
+        print(f"\n🕸️ GRAPH EXPANSION Level {depth + 1}: {len(level)} repos (Budget übrig: {budget})")
+        
+        results = graphql_batches(level, graph_fragment, GRAPH_FRAGMENT_NODES, unit='graph', project=graph_neighbours)
+        # Nur beantwortete Repos gelten als expandiert, der Rest kommt nächsten Lauf wieder
+        for name in level:
+            if name in results:
+                expanded[name] = run
+        
+        candidates = []
+        for name in level:
+            for node in results.get(name) or []:
+                if node['name'] in visited:
+                    continue
+                visited.add(node['name'])
+                found.append(node)
+                if node['stars'] >= GRAPH_EXPAND_STARS and node['name'] not in expanded:
+                    candidates.append(node)
+        
+        # Nächstes Level: beliebteste Nachbarn zuerst, falls das Budget nicht reicht
+        candidates.sort(key=lambda node: node['stars'], reverse=True)
+        level = [node['name'] for node in candidates]
+        print(f"  → {len(found)} neue Nachbarn bisher, {len(level)} für das nächste Level")
+    
+    return found
+
+# ═══════════════════════════════════════════════════════════
+# 7. SHARDING (Work-Units, Token-Pool, Merge)
+# ═══════════════════════════════════════════════════════════
+
+def parse_shard(spec: str) -> tuple:
+    """'2/4' → (2, 4), Shards zählen ab 0"""
+    index, sep, count = spec.partition('/')
+    if not sep or not index.isdigit() or not count.isdigit() or not int(index) < int(count):
+        raise argparse.ArgumentTypeError(f"--shard erwartet i/N mit 0 <= i < N, nicht {spec!r}")
+    return int(index), int(count)
+
+def use_token(token: str):
+    """Token dieses Prozesses setzen (Token-Pool), Search-Bucket passend neu anlegen"""
+    global GITHUB_TOKEN, SEARCH_PER_MIN
+    GITHUB_TOKEN = token
+    SEARCH_PER_MIN = 30 if token else 10
+    RATE_BUCKETS['search'] = TokenBucket(SEARCH_PER_MIN / 60, SEARCH_PER_MIN / 3)
+
+def shard_slices(start: date, end: date) -> List[tuple]:
+    """[start, end] → Slices: alles vor SHARD_SLICE_START zusammen, danach pro Jahr"""
+    slices = []
+    lo = start
+    while lo <= end:
+        year_end = date(max(lo.year, SHARD_SLICE_START - 1), 12, 31)
+        hi = min(end, year_end)
+        slices.append((lo, hi))
+        lo = hi + timedelta(days=1)
+    return slices
+
+def shard_of(query: str, field: str, lo: date, shards: int) -> int:
+    """Stabiler Shard einer Work-Unit (normalisierte Query, Feld, Slice)"""
+    key = f"{normalize_query(query)}|{field}|{lo.year}"
+    return int(hashlib.sha1(key.encode()).hexdigest()[:8], 16) % shards
+
+def shard_windows(state: Dict, query: str, until: date, full: bool) -> List[tuple]:
+    """Zeitfenster einer Query wie in run_query: voll ab SEARCH_START oder ab Watermark"""
+    watermark = None if full else get_watermark(state, query)
+    if not watermark:
+        return [('created', SEARCH_START, until)]
+    return [('pushed', watermark_since(watermark), until)]
+
+def shard_path(shard: int, shards: int) -> str:
+    return os.path.join(SHARD_DIR, f"shard-{shard}-of-{shards}.json")
+
+def run_shard(state: Dict, plan: List[Dict], shard: int, shards: int,
+              run_started: datetime, full: bool) -> str:
+    """
+    Shard-Worker: nur die eigenen Work-Units (Query × Slice) aller geplanten
+    Queries suchen und das Ergebnis nach SHARD_DIR schreiben. Der State
+    bleibt unverändert, das macht erst --merge.
+    """
+    records = {}
+    queries = []
+    
+    for i, entry in enumerate(plan, 1):
+        query = entry['query']
+        found = {}
+        complete = True
+        calls_before = search_calls()
+        
+        with metric_scope(query=normalize_query(query)):
+            for field, start, end in shard_windows(state, query, run_started.date(), full):
+                for lo, hi in shard_slices(start, end):
+                    if shard_of(query, field, lo, shards) != shard:
+                        continue
+                    print(f"\n[{i}/{len(plan)}] {field} {lo}..{hi}: {query[:50]}...")
+                    with track_incomplete() as incomplete:
+                        found.update(break_1000_limit_search(query, field=field, since=lo, until=hi))
+                    complete = complete and not incomplete
+        
+        records.update(found)
+        queries.append({
+            'query': query,
+            'names': sorted(found),
+            'calls': search_calls() - calls_before,
+            'complete': complete,
+            'incremental': not full and get_watermark(state, query) is not None,
+        })
+    
+    output = {
+        'shard': shard,
+        'shards': shards,
+        'run_started': run_started.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'queries': queries,
+        'records': [records[name] for name in sorted(records)],
+        'incomplete': INCOMPLETE_SLICES,
+    }
+    
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    path = shard_path(shard, shards)
+    _write_atomic(path, json.dumps(output, separators=(',', ':')))
+    print(f"\n💾 Shard {shard}/{shards}: {len(records)} repos aus {len(plan)} queries → {path}")
+    return path
+
+def pick_record(a: Dict, b: Dict) -> Dict:
+    """Deterministische Wahl bei Duplikaten: neueres pushed_at, dann Stars, dann Inhalt"""
+    def rank(record: Dict) -> tuple:
+        return (record.get('pushed_at') or '', record.get('stars') or 0,
+                json.dumps(record, sort_keys=True))
+    return a if rank(a) >= rank(b) else b
+
+def merge_shards(state: Dict, pipeline, executed: List[str]) -> Optional[datetime]:
+    """
+    --merge: alle Shard-Ausgaben in den State übernehmen.
+    - Records nach ID dedupliziert (pick_record), sortiert in die Pipeline
+    - Query-Yield über alle Shards in Plan-Reihenfolge
+    - Watermark nur, wenn alle Shards da sind und die Query überall komplett war
+    Liefert die gemeinsame Startzeit der Shards (None = keine Ausgaben).
+    """
+    outputs = []
+    for entry in sorted(os.listdir(SHARD_DIR)) if os.path.isdir(SHARD_DIR) else []:
+        if entry.startswith('shard-') and entry.endswith('.json'):
+            with open(os.path.join(SHARD_DIR, entry), 'rb') as f:
+                outputs.append(json_loads(f.read()))
+    if not outputs:
+        print(f"⚠️ Keine Shard-Ausgaben in {SHARD_DIR}")
+        return None
+    
+    outputs.sort(key=lambda output: output['shard'])
+    shards = outputs[0]['shards']
+    run_started = datetime.strptime(outputs[0]['run_started'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    missing = set(range(shards)) - {output['shard'] for output in outputs}
+    if missing or any(output['shards'] != shards or output['run_started'] != outputs[0]['run_started']
+                      for output in outputs):
+        print(f"⚠️ Shards unvollständig/uneinheitlich (fehlend: {sorted(missing)}) → keine Watermarks")
+    all_present = not missing
+    
+    merged = {}
+    for output in outputs:
+        for record in output['records']:
+            key = record_key(record)
+            merged[key] = pick_record(merged[key], record) if key in merged else record
+        INCOMPLETE_SLICES.extend(output.get('incomplete', []))
+    
+    # Query-Statistik: Namen/Calls aller Shards, Reihenfolge wie im Plan
+    per_query = {}
+    for output in outputs:
+        for entry in output['queries']:
+            combined = per_query.setdefault(entry['query'], {
+                'names': set(), 'calls': 0, 'complete': all_present, 'incremental': entry['incremental']
+            })
+            combined['names'].update(entry['names'])
+            combined['calls'] += entry['calls']
+            combined['complete'] = combined['complete'] and entry['complete']
+    
+    by_name = {record['name']: record for record in merged.values()}
+    seen = set()
+    for query, combined in per_query.items():
+        found = [by_name[name] for name in combined['names'] if name in by_name]
+        new = sum(1 for record in found if record['name'] not in seen and not is_known(state, record))
+        seen.update(record['name'] for record in found)
+        record_query_yield(state, normalize_query(query), combined['calls'], new,
+                           len(found), incremental=combined['incremental'])
+        if combined['complete']:
+            set_watermark(state, query, run_started)
+        executed.append(query)
+    
+    records = sorted(merged.values(), key=lambda record: record['name'])
+    for start in range(0, len(records), ENRICH_BATCH):
+        pipeline.feed(records[start:start + ENRICH_BATCH])
+    
+    print(f"🔀 MERGE: {len(outputs)}/{shards} Shards, {len(records)} repos "
+          f"({sum(len(o['records']) for o in outputs) - len(records)} Duplikate), {len(per_query)} queries")
+    return run_started
+
 # ═══════════════════════════════════════════════════════════
 # MAIN MEGA SEARCH
 # ═══════════════════════════════════════════════════════════
 
-def main():
-    state = {'known_repos': set(), 'posted_events': set()}
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Flipper Zero Mega Search")
+    parser.add_argument('--full', action='store_true',
+                        help="Watermarks ignorieren und alles neu crawlen")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Nur Query-Plan + geschätzte Search-Kosten ausgeben")
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help="Nur die Work-Units von Shard i (0..N-1) suchen, Ausgabe nach SHARD_DIR")
+    parser.add_argument('--merge', action='store_true',
+                        help="Shard-Ausgaben aus SHARD_DIR zusammenführen und weiterverarbeiten")
+    parser.add_argument('--run-started', metavar='ISO',
+                        type=lambda value: datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc),
+                        help="Gemeinsame Startzeit aller Shards (gleiche Slices + Watermarks)")
+    args = parser.parse_args(argv)
+    
+    if args.shard and GITHUB_TOKENS:
+        use_token(GITHUB_TOKENS[args.shard[0] % len(GITHUB_TOKENS)])
+    elif GITHUB_TOKENS and not GITHUB_TOKEN:
+        use_token(GITHUB_TOKENS[0])
+    
+    state = load_state()
+    run_started = args.run_started or datetime.now(timezone.utc)
+    METRICS.reset()
+    METRICS.known = lambda record: is_known(state, record)
     
     print("=" * 70)
     print("🚀 FLIPPER ZERO MEGA SEARCH v14.0 - ABSOLUTE MAXIMUM")
     print("=" * 70)
     
-    # RATE LIMIT CHECK
-    check_rate_limit()
-    
     # PHASE 1: Intelligent Topic Queries
     print("\n📍 PHASE 1: INTELLIGENT TOPIC DISCOVERY...")
     topic_queries = discover_topic_combinations(state)
+    search_budget = int(SEARCH_BUDGET * (1 - PATTERN_BUDGET_SHARE))
+    # Alle Shards planen identisch; jeder bringt sein eigenes Token-Budget mit
+    shards = args.shard[1] if args.shard else 1
+    plan = [] if args.merge else allocate_budget(
+        plan_queries(topic_queries, state, full=args.full), state, search_budget * shards
+    )
     
-    all_repos = set()
+    if args.dry_run:
+        print_dry_run(plan)
+        return
     
-    # Execute first 50 queries with 1000-limit breaking
-    for i, query in enumerate(topic_queries[:50], 1):
-        print(f"\n[{i}/50] Query: {query[:60]}...")
-        repos = break_1000_limit_search(query)
-        all_repos.update(repos)
+    # RATE LIMIT CHECK
+    with metric_scope(phase='setup'):
+        check_rate_limit()
+    
+    if args.shard:
+        shard, shards = args.shard
+        JOURNAL.path = f"{JOURNAL.path}.{shard}-of-{shards}"
+        started = JOURNAL.open(run_started)
+        PAYLOAD_SPOOL.open(resume=started != run_started)
+        run_started = started
+        print(f"\n📍 SHARD {shard}/{shards}: {len(plan)} geplante Queries...")
+        with metric_scope(phase='search'):
+            run_shard(state, plan, shard, shards, run_started, args.full)
+        PAYLOAD_SPOOL.close()
+        JOURNAL.finish()
+        print_metrics(write_metrics())
+        return
+    
+    # Offenes Journal → Lauf fortsetzen (gleiche Startzeit = gleiche Slices)
+    started = JOURNAL.open(run_started)
+    PAYLOAD_SPOOL.open(resume=started != run_started)
+    run_started = started
+    state['run_count'] += 1
+    search_calls_before = search_calls()
+    
+    pipeline = Pipeline(state, velocity=star_velocities(run_started))
+    executed = []
+    
+    # Code-Search braucht ein Token; läuft mit eigenem Budget neben der Topic-Search
+    code_lane = CodeSearchLane().start() if GITHUB_TOKEN and CODE_SEARCH_BUDGET > 0 else None
+    
+    if args.merge:
+        with metric_scope(phase='merge'):
+            run_started = merge_shards(state, pipeline, executed) or run_started
+    
+    def run_query(query: str) -> int:
+        """Inkrementell ab Watermark, sonst voller 1000-Limit-Crawl → neue Repos"""
+        watermark = None if args.full else get_watermark(state, query)
+        calls_before = search_calls()
+        key = normalize_query(query)
+        new = 0
+        
+        def on_leaf(records: List[Dict]):
+            nonlocal new
+            new += pipeline.feed(records)
+        
+        with metric_scope(query=key), track_incomplete() as incomplete:
+            if watermark:
+                print(f"\n⏩ INCREMENTAL: {query[:50]}... (seit {watermark_since(watermark).isoformat()})")
+                repos = incremental_search(query, watermark, until=run_started.date(),
+                                           on_leaf=on_leaf, on_nodes=pipeline.absorb_nodes)
+            else:
+                repos = break_1000_limit_search(query, until=run_started.date(),
+                                                on_leaf=on_leaf, on_nodes=pipeline.absorb_nodes)
+        
+        # Watermark nur vorrücken, wenn keine Slice dieser Query verloren ging
+        if not incomplete:
+            set_watermark(state, query, run_started)
+        
+        # Yield = neue Repos, die keine frühere Query dieses Laufs schon fand
+        record_query_yield(state, key, search_calls() - calls_before, new,
+                           len(repos), incremental=bool(watermark))
+        return new
+    
+    # Search-Frontier: geplante Queries, Pattern-Queries werden laufend angehängt
+    frontier = deque((entry, 'search') for entry in plan)
+    
+    def feed_back(queries: List[str], label: str):
+        """Neue Pattern-Queries planen und mit dem Rest-Budget in die Frontier"""
+        queued = [entry['query'] for entry, _ in frontier]
+        budget = SEARCH_BUDGET - (search_calls() - search_calls_before)
+        budget -= sum(entry['cost'] for entry, _ in frontier)
+        planned = allocate_budget(
+            plan_queries(queries, state, executed=executed + queued, full=args.full), state, max(0, budget)
+        )
+        frontier.extend((entry, label) for entry in planned)
+    
+    # PHASE 1 + 2: Search, Enrichment läuft im Hintergrund mit
+    print(f"\n📍 PHASE 1+2: SEARCH → GRAPHQL PIPELINE...")
+    last_feedback = 0
+    patterns = None
+    
+    while frontier or patterns is None:
+        # PHASE 3 sobald die geplanten Queries durch sind (Enrichment läuft weiter)
+        if not frontier:
+            print(f"\n📍 PHASE 3: TOPIC PATTERN ANALYSIS...")
+            with metric_scope(phase='analysis'):
+                remember_repos(state, pipeline.spool)
+                patterns = analyze_topic_patterns(list(load_records(state).values()))
+            
+            # PHASE 4: häufige Kombinationen aller Längen über ALLE bekannten Repos
+            print(f"\n📍 PHASE 4: PATTERN-BASED DISCOVERY...")
+            new_queries = JOURNAL.get('phase4', 'queries')
+            if new_queries is None:
+                combos = [entry for entries in patterns['itemsets'].values() for entry in entries]
+                combos.sort(key=lambda entry: entry[1]['count'], reverse=True)
+                new_queries = combo_queries(topics for topics, stats in combos[:30])
+                JOURNAL.record('phase4', 'queries', new_queries)
+            feed_back(new_queries, 'pattern_search')
+            continue
+        
+        if search_calls() - search_calls_before >= SEARCH_BUDGET:
+            print(f"\n  💸 Search-Budget ({SEARCH_BUDGET} calls) aufgebraucht → {len(frontier)} queries übersprungen")
+            break
         
-        if i % 5 == 0:
-            print(f"\n  📊 Progress: {len(all_repos)} total repos found")
-            time.sleep(5)
+        entry, label = frontier.popleft()
+        print(f"\n[{len(executed) + 1}/{len(executed) + len(frontier) + 1}] {label}: {entry['query'][:60]}...")
+        with metric_scope(phase=label):
+            run_query(entry['query'])
+        executed.append(entry['query'])
+        
+        if len(executed) % 5 == 0:
+            print(f"\n  📊 Progress: {len(pipeline.seen)} repos, {pipeline.enriched} enriched, "
+                  f"{pipeline.queue.qsize()} batches in der Queue")
+        
+        # PHASE 4 (laufend): häufige Kombinationen aus dem Stream → neue Queries
+        if pipeline.topics.records - last_feedback >= FEEDBACK_EVERY:
+            last_feedback = pipeline.topics.records
+            print(f"\n  🔁 FEEDBACK nach {last_feedback} Records")
+            feed_back(combo_queries(pipeline.topics.top_combos()), 'pattern_search')
     
-    # PHASE 2: GraphQL Mega Batch
-    print(f"\n📍 PHASE 2: GRAPHQL MEGA BATCH...")
-    graphql_data = graphql_mega_batch(list(all_repos)[:500], state)
+    if patterns is None:
+        with metric_scope(phase='analysis'):
+            remember_repos(state, pipeline.spool)
+            patterns = analyze_topic_patterns(list(load_records(state).values()))
     
-    # PHASE 3: Topic Pattern Analysis
-    print(f"\n📍 PHASE 3: TOPIC PATTERN ANALYSIS...")
-    patterns = analyze_topic_patterns(graphql_data)
+    # Code-Lane vor der Graph-Expansion einsammeln → ihre Repos werden auch Seeds
+    if code_lane:
+        print(f"\n  ⏳ Warte auf die Code-Search-Lane...")
+        nodes = code_lane.join()
+        pipeline.absorb_nodes(nodes)
+        code_new = pipeline.feed([graphql_record(node) for node in nodes])
+        print(f"  📄 Code-Search: {len(nodes)} repos, {code_new} neu, {REQUEST_COUNTS['code']} calls")
     
-    # PHASE 4: Generate new queries based on patterns
-    print(f"\n📍 PHASE 4: PATTERN-BASED DISCOVERY...")
+    # Fällige Refreshs schon jetzt wählen (→ Seeds), enrichen erst nach dem Graph
+    due = pipeline.due(time.time())
     
-    new_queries = []
-    for (t1, t2), stats in list(patterns['pairs'].items())[:30]:
-        if stats['count'] >= 3:  # Mindestens 3x gesehen
-            new_queries.append(f"topic:{t1} topic:{t2} archived:false")
+    # PHASE 3c: Graph-Expansion ab den bisher enrichten Repos
+    if GRAPH_NODE_BUDGET > 0:
+        with metric_scope(phase='graph'):
+            with pipeline.lock:
+                seeds = [name for stars, name in sorted(pipeline.seeds, reverse=True)]
+            neighbours = expand_graph(state, seeds, set(pipeline.seen))
+            graph_new = pipeline.feed([graphql_record(node) for node in neighbours])
+        print(f"  🕸️ Graph: {len(seeds)} Seeds → {len(neighbours)} Nachbarn, {graph_new} neu")
     
-    # Execute pattern-based queries
-    for query in new_queries[:20]:
-        repos = break_1000_limit_search(query)
-        all_repos.update(repos)
+    # Rest des Enrichment-Budgets: fällige Repos aus dem Refresh-Scheduler
+    refreshed = pipeline.refresh(due)
+    print(f"  🔁 Refresh: {refreshed} fällige repos "
+          f"({pipeline.queued}/{ENRICH_BUDGET} Enrichment-Budget)")
+    
+    print(f"\n  ⏳ Warte auf Enrichment ({pipeline.queue.qsize()} batches in der Queue)...")
+    events = pipeline.close()
+    print(f"  🔎 {len(events)} Release/Tag/Commit-Events seit dem letzten Lauf")
+    
+    new_records = []
+    for record in pipeline.spool:
+        if not is_known(state, record):
+            new_records.append(record)
+        remember_repos(state, [record])
+        state['index'].add(record.get('id'))
+        if record.get('id') is not None:
+            state['legacy_names'].discard(record['name'])
+    
+    # PHASE 3b: Stars/Forks-Snapshot + Momentum über alle Repos
+    with metric_scope(phase='momentum'):
+        momentum = analyze_momentum(state, pipeline.spool, run_started)
+    pipeline.spool.close()
+    new_records.sort(key=lambda record: record['name'])
+    events = emit_events(state, new_repo_events(new_records) + events)
     
-    state['known_repos'] = all_repos
+    # PHASE 5: Telegram
+    print(f"\n📍 PHASE 5: TELEGRAM DIGEST...")
+    with metric_scope(phase='notify'):
+        dispatch = dispatch_events(state, events, make_transport())
+    save_state(state)
+    PAYLOAD_SPOOL.close()
+    JOURNAL.finish()
     
     print(f"\n{'='*70}")
     print(f"✅ MEGA SEARCH COMPLETE!")
-    print(f"   Total Repos: {len(all_repos)}")
-    print(f"   Queries Executed: {len(topic_queries[:50]) + len(new_queries[:20])}")
+    print(f"   Total Repos: {len(state['index']) + len(state['legacy_names'])}")
+    print(f"   New Repos: {len(new_records)}")
+    print(f"   Queries Executed: {len(executed)}")
+    print(f"   Search Calls: {search_calls()}")
     print(f"   Unique Topics Found: {len(patterns['singles'])}")
+    print(f"   Trending Repos: {len(momentum['trending'])}")
+    print(f"   New Events: {len(events)} " + ", ".join(
+        f"{sum(1 for e in events if e['type'] == kind)} {kind}"
+        for kind in sorted({e['type'] for e in events})))
+    print(f"   Telegram: {dispatch['sent']} Nachrichten, {dispatch['pending']} Events in der Outbox")
+    print(f"   Incomplete Slices: {len(INCOMPLETE_SLICES)}")
+    for entry in INCOMPLETE_SLICES:
+        print(f"     ❌ {entry['query'][:70]} (page {entry['page']}): {entry['reason']}")
+    print_metrics(write_metrics())
     print(f"{'='*70}\n")
 
 if __name__ == "__main__":
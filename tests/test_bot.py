@@ -0,0 +1,140 @@
+"""
+Regressionstests für bot.py gegen den Mock aus benchmark.py.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark
+import bot
+
+CORPUS_SIZE = 600
+
+@pytest.fixture
+def bot_globals(monkeypatch):
+    """bot-Globals, die configure_bot und ein Lauf ändern → nach dem Test zurück, Zähler/Budgets frisch"""
+    for name in ('API_URL', 'STATE_FILE', 'REPO_INDEX_FILE', 'REPO_RECORDS_FILE', 'CACHE_DIR', 'JOURNAL',
+                 'RUN_SPOOL_FILE', 'PAYLOAD_SPOOL', 'METRICS_FILE', 'METRICS_PROM_FILE', 'SHARD_DIR',
+                 'SNAPSHOT_DIR', 'TELEGRAM_TRANSPORT', 'GITHUB_TOKEN', 'BACKOFF_BASE',
+                 'SECONDARY_LIMIT_WAIT', 'TELEGRAM_PER_MIN', 'SEARCH_BACKEND'):
+        monkeypatch.setattr(bot, name, getattr(bot, name))
+    for bucket in bot.RATE_BUCKETS.values():
+        for attr in ('base_rate', 'rate', 'capacity', 'tokens'):
+            monkeypatch.setattr(bucket, attr, getattr(bucket, attr))
+    monkeypatch.setattr(bot, 'INCOMPLETE_SLICES', [])
+    monkeypatch.setattr(bot, 'REQUEST_COUNTS', defaultdict(int))
+    monkeypatch.setattr(bot, 'CODE_BUDGET', {'until': bot.CODE_SEARCH_BUDGET})
+    monkeypatch.setattr(bot, 'GRAPHQL_BUDGET', {'remaining': bot.GRAPHQL_POINTS, 'last_cost': 1, 'reset_at': 0.0})
+
+@pytest.fixture
+def mock(tmp_path, bot_globals):
+    """Mock-Server + Bot mit Temp-Verzeichnis"""
+    server_mock = benchmark.MockGitHub(benchmark.synthetic_corpus(CORPUS_SIZE, 4.0, 1), seed=1)
+    server = benchmark.start_server(server_mock)
+    benchmark.configure_bot(server, str(tmp_path), real_limits=False)
+    yield server_mock
+    server.shutdown()
+
+def run_main(argv=()):
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot.main(list(argv))
+
+def journal_units(path):
+    """(kind, key) aller Einheiten im Journal, inkl. Duplikaten"""
+    with open(path, 'rb') as f:
+        return [(entry['k'], entry['key']) for entry in map(json.loads, f) if entry['k'] != 'run']
+
+# ═══════════════════════════════════════════════════════════
+# TOPIC-MINING + PLANER
+# ═══════════════════════════════════════════════════════════
+
+def test_eclat_matches_brute_force():
+    records = benchmark.zipf_records(3000, 400, 7)
+    brute = benchmark.brute_force_itemsets(records, bot.ITEMSET_MIN_SUPPORT)
+    mined = bot.mine_topic_itemsets(records, max_len=3)
+
+    assert mined['found'] == len(brute[2]) + len(brute[3])
+    for length in (2, 3):
+        got = mined['itemsets'][length]
+        assert [stats['count'] for _, stats in got] == \
+            [count for _, count in brute[length].most_common(bot.ITEMSET_TOP_K)]
+        assert all(brute[length][topics] == stats['count'] for topics, stats in got)
+
+def test_not_is_parsed_as_negation():
+    wide, narrow = bot.parse_query('topic:a topic:b'), bot.parse_query('topic:a NOT topic:b')
+
+    assert narrow == bot.parse_query('topic:a -topic:b')
+    assert not bot.query_subsumes(wide, narrow)
+    assert bot.query_subsumes(bot.parse_query('topic:a'), narrow)
+
+# ═══════════════════════════════════════════════════════════
+# CRAWL JOURNAL
+# ═══════════════════════════════════════════════════════════
+
+def test_journal_resume_does_not_duplicate_units(mock, monkeypatch):
+    path = bot.JOURNAL.path
+    save_state = bot.save_state
+
+    # Lauf 1 bricht nach der Arbeit ab, bevor der State gespeichert wird
+    def crash(state):
+        raise RuntimeError("kill")
+
+    monkeypatch.setattr(bot, 'save_state', crash)
+    with pytest.raises(RuntimeError):
+        run_main()
+    bot.JOURNAL.file.close()
+    bot.JOURNAL.reader.close()
+    first = journal_units(path)
+    search_before = mock.requests.get('search', 0)
+    monkeypatch.setattr(bot, 'save_state', save_state)
+
+    # Lauf 2 = neuer Prozess: frisches Journal-Objekt, Journal-Datei bleibt zum Prüfen liegen
+    bot.JOURNAL = bot.CrawlJournal(path)
+    monkeypatch.setattr(bot.CrawlJournal, 'finish', lambda self: (self.file.close(), self.reader.close()))
+    run_main()
+    resumed = journal_units(path)
+
+    assert first
+    assert resumed[:len(first)] == first
+    assert not [unit for unit, count in Counter(resumed).items() if count > 1]
+    assert mock.requests.get('search', 0) == search_before
+
+# ═══════════════════════════════════════════════════════════
+# WATERMARKS
+# ═══════════════════════════════════════════════════════════
+
+def test_code_lane_gaps_keep_topic_watermarks(mock, monkeypatch):
+    # Budget reicht nicht für die Code-Queries → die Lane markiert Slices unvollständig
+    monkeypatch.setattr(bot, 'CODE_SEARCH_BUDGET', 6)
+    run_main()
+    state = bot.load_state()
+
+    assert any('Code-Search-Budget' in entry['reason'] for entry in bot.INCOMPLETE_SLICES)
+    assert state['query_stats']
+    assert {bot.normalize_query(query) for query in state['watermarks']} == set(state['query_stats'])
+
+# ═══════════════════════════════════════════════════════════
+# BENCHMARK
+# ═══════════════════════════════════════════════════════════
+
+def test_benchmark_runs_against_mock(tmp_path, bot_globals):
+    output = tmp_path / 'bench.json'
+    with contextlib.redirect_stdout(io.StringIO()):
+        benchmark.main(['--repos', '400', '--queries', '8', '--json', str(output)])
+    phases = {row['phase']: row for row in json.loads(output.read_text())}
+
+    assert phases['search']['recall'] == 1.0
+    assert phases['main (incremental)']['result'] == phases['main (cold)']['result'] > 0
+    assert phases['main (incremental)']['requests']['search'] < phases['main (cold)']['requests']['search']
+    # Run-Spool liegt im Temp-Verzeichnis des Benchmarks, nicht im geteilten Default
+    assert os.path.basename(os.path.dirname(bot.RUN_SPOOL_FILE)).startswith('flipper_bench_')